@@ -1,36 +1,257 @@
 import streamlit as st
-import pandas as pd
 from config import AppConfig
-from llm.client import LLMClient
+from llm.client import build_llm_client
 from core.gatekeeper import gatekeep
 from core.task_planner import plan_tasks
 from core.clarifier import clarify_tasks_if_needed
 from core.executors import execute_tasks
 from core.composer import compose
-from data_utils import summarize_df
+from core.confidence import estimate_confidence
+from confidence import get_confidence_async
+from data_utils import load_csv
+from core.datasets import register_dataset, build_catalog
+from core.fast_path import answer_from_cube
 from memory import init_memory, store_definition, get_definitions
 
 st.set_page_config(layout="wide")
 st.title("Interactive Analytics Copilot (GPT-4o-mini Optimized)")
 
+
+@st.cache_resource
+def get_config():
+    return AppConfig.from_env()
+
+
+@st.cache_resource
+def get_llm():
+    # One client (and HTTP connection pool) per process, shared across reruns and sessions
+    config = get_config()
+    llm = build_llm_client(config)
+    if config.prewarm:
+        llm.prewarm()
+    return llm
+
+
+@st.cache_resource(show_spinner="Profiling dataset...")
+def get_dataset(filename, content):
+    # Keyed on the file bytes: re-uploads of the same file reuse the profile and rollup cube
+    import io
+    return register_dataset(filename, load_csv(io.BytesIO(content)), arrow_strings=get_config().arrow_strings)
+
+
+@st.cache_resource(show_spinner="Uploading dataset to the copilot service...")
+def get_remote_dataset(filename, content):
+    # Same keying as get_dataset; the service profiles the file and returns its version
+    return get_service().upload_dataset(filename, content)
+
+
+@st.cache_resource
+def get_service():
+    from service.client import ServiceClient
+    return ServiceClient(get_config().service_url)
+
+
+@st.cache_resource(show_spinner="Discovering join keys...")
+def get_catalog(key, _datasets, primary=None):
+    # Keyed on (name, version) pairs; discovery only compares the per-column sketches
+    return build_catalog(_datasets, primary)
+
+
+def render_answer(answer):
+    st.markdown(answer["final"])
+    for figure in answer["figures"]:
+        st.plotly_chart(figure, use_container_width=True)
+    st.write(answer["confidence"])
+    if answer.get("llm_confidence"):
+        st.caption(answer["llm_confidence"])
+
+
+def llm_confidence_caption(pending):
+    try:
+        scored = pending.result()
+        return f"Model-scored confidence: {scored['score']:.2f} — {scored['rationale']}"
+    except Exception:
+        return "Model-scored confidence unavailable."
+
+
+def poll_llm_confidence(answer, pending):
+    """
+    Shows "pending" until the background score resolves, then hands the scored answer to one full
+    rerun that re-renders it. That run registers no fragment, so the polling stops with it.
+    """
+    if not pending.done():
+        st.caption("Model-scored confidence: pending…")
+        return
+    st.session_state["scored_answer"] = {**answer, "llm_confidence": llm_confidence_caption(pending)}
+    st.rerun()
+
+
+if hasattr(st, "fragment"):
+    poll_llm_confidence = st.fragment(run_every=1)(poll_llm_confidence)
+else:
+    def poll_llm_confidence(answer, pending):
+        # No fragments before Streamlit 1.37: show the score only if it is already there, never wait
+        st.caption(llm_confidence_caption(pending) if pending.done() else "Model-scored confidence: not ready yet.")
+
+
+def stream_remote(uploads, question, context, primary):
+    """
+    Events from the service's /ask/stream. A 404 means the service no longer has our uploads
+    (restart or eviction): forget the cached versions, re-upload and ask once more.
+    """
+    from itertools import chain
+    from service.client import ServiceError
+
+    for attempt in range(2):
+        versions = [get_remote_dataset(f.name, f.getvalue())["version"] for f in uploads or []]
+        events = get_service().stream(question, versions, context, primary)
+        try:
+            # The request is sent on the first read
+            first = next(events, None)
+        except ServiceError as e:
+            if e.status == 404 and attempt == 0:
+                get_remote_dataset.clear()
+                continue
+            raise
+        return [] if first is None else chain([first], events)
+
+
+def run_remote():
+    """Thin-client mode: uploads, the pipeline and confidence all run in service/server.py."""
+    from service.client import ServiceError
+
+    try:
+        _run_remote()
+    except ServiceError as e:
+        st.error(f"The copilot service could not answer ({e.status}): {e.message}")
+    except OSError as e:
+        st.error(f"The copilot service at {get_config().service_url} is unreachable: {e}")
+
+
+def _run_remote():
+    import json
+
+    uploads = st.file_uploader("Upload CSVs (optional; several tables can be joined)", type=["csv"], accept_multiple_files=True)
+    remote = [get_remote_dataset(f.name, f.getvalue()) for f in uploads or []]
+    primary = None
+    if len(remote) > 1:
+        primary = st.selectbox("Primary table (quick answers and charts)", [d["name"] for d in remote])
+    for d in remote:
+        st.caption(f"{d['name']}: {d['summary']['rows']:,} rows, {d['summary']['total_columns']} columns (version {d['version']})")
+
+    user_input = st.text_area("Ask your analytics question:")
+    if not st.button("Run"):
+        return
+
+    prior = get_definitions()
+    context = "\n".join([f"{k}: {v}" for k, v in prior.items()]) if prior else ""
+
+    status = st.empty()
+    for event in stream_remote(uploads, user_input, context, primary):
+        stage, data = event["stage"], event["data"]
+        if stage == "gatekeep":
+            status.caption("Planning…")
+            if data.get("questions"):
+                st.info("Optional context to improve accuracy (not required):")
+                for q in data["questions"]:
+                    st.write(f"- {q}")
+        elif stage == "plan":
+            status.caption(f"Running {len(data['tasks'])} task(s)…")
+        elif stage == "result":
+            st.markdown(f"### {data['intent']}\n{data['output']}")
+            figure = data.get("metadata", {}).get("figure")
+            if figure is not None:
+                import plotly.io as pio
+                st.plotly_chart(pio.from_json(json.dumps(figure)), use_container_width=True)
+        elif stage == "error":
+            status.empty()
+            st.error(data["error"])
+        elif stage == "final":
+            status.empty()
+            if data["status"] == "fast_path":
+                st.markdown(data["answer"])
+            elif data["status"] == "refused":
+                st.error(data["message"])
+            elif data["status"] == "needs_clarification":
+                st.warning("Required clarification before proceeding:")
+                for q in data["questions"]:
+                    st.write(f"- {q}")
+            else:
+                confidence = data["confidence"]
+                st.write(f"Confidence: {confidence['score']:.2f} — {confidence['rationale']}")
+
+
 init_memory()
 
-config = AppConfig.from_env()
-llm = LLMClient(config)
+config = get_config()
+if config.service_url:
+    run_remote()
+    st.stop()
+
+llm = get_llm()
 
-uploaded = st.file_uploader("Upload CSV (optional)", type=["csv"])
+uploads = st.file_uploader("Upload CSVs (optional; several tables can be joined)", type=["csv"], accept_multiple_files=True)
 df_summary = None
 df = None
+dataset = None
+catalog = None
 
-if uploaded:
-    df = pd.read_csv(uploaded)
-    df_summary = summarize_df(df)
+if uploads:
+    loaded = [get_dataset(f.name, f.getvalue()) for f in uploads]
+    primary = None
+    if len(loaded) > 1:
+        primary = st.selectbox("Primary table (quick answers and charts)", [d.name for d in loaded])
+    catalog = get_catalog(tuple((d.name, d.version) for d in loaded), loaded, primary)
+
+    dataset = catalog.primary_dataset
+    df = dataset.df
+    df_summary = catalog.summary()
     st.write(df.head())
 
+    if len(catalog.datasets) > 1:
+        with st.expander(f"{len(catalog.datasets)} tables, {len(catalog.relationships)} join keys detected"):
+            for name, d in catalog.datasets.items():
+                st.write(f"**{name}**: {d.summary['rows']:,} rows, {d.summary['total_columns']} columns")
+            for r in catalog.relationships:
+                st.write(
+                    f"- `{r['left_table']}.{r['left_column']}` -> `{r['right_table']}.{r['right_column']}` "
+                    f"({r['cardinality']}, {r['containment']:.0%} of values match)"
+                )
+
+    # A replaced upload makes earlier cached query results unreachable; free them now
+    from data.sql_runner import RESULT_CACHE, invalidate_dataset
+    current = set(catalog.versions.values())
+    for previous in st.session_state.get("dataset_versions", []):
+        if previous not in current:
+            invalidate_dataset(previous)
+    st.session_state["dataset_versions"] = sorted(current)
+
+    cache = RESULT_CACHE.stats()
+    st.sidebar.caption(
+        f"Query cache: {cache['entries']} results, {cache['bytes'] / 1e6:.1f} MB, "
+        f"hit rate {cache['hit_rate']:.0%} ({cache['hits']} hits / {cache['misses']} misses)"
+    )
+
+    memory = dataset.stats.get("memory")
+    if memory:
+        st.caption(
+            f"In-memory size: {memory['memory_before'] / 1e6:.1f} MB -> {memory['memory_after'] / 1e6:.1f} MB "
+            f"({len(memory['columns'])} columns compacted)"
+        )
+
 user_input = st.text_area("Ask your analytics question:")
 
+# Set only by poll_llm_confidence for the single rerun right after the score arrived
+scored_answer = st.session_state.pop("scored_answer", None)
+
 if st.button("Run"):
 
+    # 0) Fast path: plain metric-by-dimension questions straight from the rollup cube, no LLM
+    quick = answer_from_cube(user_input, dataset.cube) if dataset else None
+    if quick:
+        st.markdown(quick["output"])
+        st.stop()
+
     # Include prior clarifications in context
     prior = get_definitions()
     prior_context = "\n".join([f"{k}: {v}" for k, v in prior.items()]) if prior else ""
@@ -72,7 +293,6 @@ if st.button("Run"):
 
     # 2) Plan tasks
     plan = plan_tasks(llm, enriched_input, df_summary)
-    st.write(f"Confidence: {plan.get('confidence', 0.0):.2f}")
 
     # 3) Clarifier (hard blocking only for SQL/Pandas)
     clarification = clarify_tasks_if_needed(plan["tasks"], df_summary)
@@ -90,8 +310,25 @@ if st.button("Run"):
         st.stop()
 
     # 4) Execute supported tasks
-    results = execute_tasks(llm, plan["tasks"], df_summary=df_summary, df=df)
+    results = execute_tasks(
+        llm, plan["tasks"], df_summary=df_summary, df=df,
+        dataset_version=dataset.version if dataset else None, catalog=catalog
+    )
 
     # 5) Compose
     final = compose(user_input, plan["tasks"], results)
-    st.markdown(final)
+
+    # 6) Confidence: local estimate immediately, optional LLM score once it arrives
+    local = estimate_confidence(plan, results, gk=gk, df_summary=df_summary)
+    answer = {
+        "final": final,
+        "figures": [r["metadata"]["figure"] for r in results if r.get("metadata", {}).get("figure") is not None],
+        "confidence": f"Confidence: {local['score']:.2f} — {local['rationale']}",
+    }
+    render_answer(answer)
+
+    if config.llm_confidence:
+        poll_llm_confidence(answer, get_confidence_async(llm, final))
+
+elif scored_answer:
+    render_answer(scored_answer)
@@ -0,0 +1,70 @@
+"""
+Recall check for sketch-based join-key discovery.
+
+    python bench/join_recall.py            # exits 1 if recall drops below the floor
+    python bench/join_recall.py --seeds 50
+
+For foreign keys of very different sizes drawn from a 1M-value primary key (the events ->
+accounts shape), counts how often discover_relationships finds the link, and how close the
+estimated containment is. Also checks that an unrelated column of the same size isn't linked.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from data.join_discovery import discover_relationships, sketch_table
+
+PK_SIZE = 1_000_000
+FK_SIZES = [200, 5_000, 20_000, 200_000]
+MIN_RECALL = 0.95
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seeds", type=int, default=20)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    accounts = pd.DataFrame({"id": np.arange(1, PK_SIZE + 1)})
+    pk_sketches = sketch_table(accounts)
+    print(f"primary key: {PK_SIZE:,} values, sketched in {(time.perf_counter() - start) * 1000:.0f} ms\n")
+    print(f"{'fk values':>9} {'recall':>7} {'containment':>12} {'false links':>12}")
+
+    failed = False
+    for size in FK_SIZES:
+        found, false_links, shares = 0, 0, []
+        for seed in range(args.seeds):
+            rng = np.random.default_rng(seed)
+            keys = rng.choice(PK_SIZE, size=size, replace=False) + 1
+            events = pd.DataFrame({
+                "account_id": rng.choice(keys, size=size * 3),
+                # Same cardinality, values outside the key range: must not link
+                "session_id": rng.choice(np.arange(size) + 10 * PK_SIZE, size=size * 3),
+            })
+            rels = discover_relationships({"events": sketch_table(events), "accounts": pk_sketches})
+            links = {(r["left_column"], r["right_column"]): r for r in rels}
+            if ("account_id", "id") in links:
+                found += 1
+                shares.append(links[("account_id", "id")]["containment"])
+            false_links += ("session_id", "id") in links
+
+        recall = found / args.seeds
+        failed |= recall < MIN_RECALL or false_links > 0
+        share = f"{np.mean(shares):.3f}" if shares else "-"
+        print(f"{size:>9,} {recall:>7.0%} {share:>12} {false_links:>12}")
+
+    if failed:
+        print(f"\nFAIL: recall below {MIN_RECALL:.0%} or a false link was reported")
+        sys.exit(1)
+    print("\nOK")
+
+
+if __name__ == "__main__":
+    main()
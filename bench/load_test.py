@@ -0,0 +1,144 @@
+"""
+Load test for the HTTP service against the offline stub model.
+
+    python bench/load_test.py                          # workers 1,2,4,8,16; 32 clients; 10s each
+    python bench/load_test.py --workers 4 16 --clients 64 --duration 20
+
+For each worker count a fresh service process is started (LLM_PROVIDER=stub), the sample
+dataset is uploaded, and N closed-loop clients POST /ask for the duration. Stub calls sleep
+(STUB_LATENCY_MS), like network-bound upstream calls, so throughput should scale with the
+pool until clients or CPU become the limit. 503s are the service shedding load (backpressure).
+"""
+import argparse
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from service.client import ServiceClient
+
+SAMPLE_CSV = os.path.join(ROOT, "Sample data files", "customer_events.csv")
+QUESTIONS = [
+    "Write a SQL query for revenue by segment",
+    "What strategy should we use to reduce churn in SMB?",
+    "Analyze feature adoption for the new dashboard",
+]
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_service(workers: int, max_queue: int, port: int) -> subprocess.Popen:
+    env = dict(os.environ, LLM_PROVIDER="stub", LLM_PREWARM="1")
+    proc = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "service", "server.py"), "--port", str(port),
+         "--workers", str(workers), "--max-queue", str(max_queue)],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    client = ServiceClient(f"http://127.0.0.1:{port}", timeout=5)
+    for _ in range(100):
+        try:
+            client.health()
+            return proc
+        except OSError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError("Service did not start")
+
+
+def upload_sample(port: int) -> list:
+    if not os.path.exists(SAMPLE_CSV):
+        return []
+    import pandas as pd
+
+    # The sample file is tab-separated; the service expects a plain CSV
+    content = pd.read_csv(SAMPLE_CSV, sep="\t").to_csv(index=False).encode("utf-8")
+    return [ServiceClient(f"http://127.0.0.1:{port}").upload_dataset("customer_events.csv", content)["version"]]
+
+
+def run_clients(port: int, datasets: list, clients: int, duration: float):
+    stop_at = time.perf_counter() + duration
+    lock = threading.Lock()
+    latencies, counts = [], {"ok": 0, "rejected": 0, "errors": 0}
+
+    def worker(i):
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+        n = i
+        while time.perf_counter() < stop_at:
+            body = json.dumps({"question": QUESTIONS[n % len(QUESTIONS)], "datasets": datasets})
+            n += 1
+            start = time.perf_counter()
+            try:
+                conn.request("POST", "/ask", body, {"Content-Type": "application/json"})
+                response = conn.getresponse()
+                response.read()
+                status = response.status
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+                status = 0
+            elapsed = (time.perf_counter() - start) * 1000
+            with lock:
+                if status == 200:
+                    counts["ok"] += 1
+                    latencies.append(elapsed)
+                elif status == 503:
+                    counts["rejected"] += 1
+                else:
+                    counts["errors"] += 1
+            if status == 503:
+                time.sleep(0.05)
+        conn.close()
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(clients)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return counts, sorted(latencies), time.perf_counter() - start
+
+
+def pct(values, p):
+    return values[min(len(values) - 1, int(p * len(values)))] if values else float("nan")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--max-queue", type=int, default=None, help="default: enough for every client (no shedding)")
+    args = parser.parse_args()
+
+    print(f"stub latency {os.getenv('STUB_LATENCY_MS', '50')} ms/call, {args.clients} clients, {args.duration:.0f}s per run\n")
+    print(f"{'workers':>7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'ok':>6} {'503':>6} {'err':>5}")
+
+    for workers in args.workers:
+        port = free_port()
+        max_queue = args.max_queue if args.max_queue is not None else args.clients
+        proc = start_service(workers, max_queue, port)
+        try:
+            datasets = upload_sample(port)
+            counts, latencies, elapsed = run_clients(port, datasets, args.clients, args.duration)
+        finally:
+            proc.terminate()
+            proc.wait()
+        print(
+            f"{workers:>7} {counts['ok'] / elapsed:>8.1f} {pct(latencies, 0.5):>8.0f} {pct(latencies, 0.95):>8.0f} "
+            f"{counts['ok']:>6} {counts['rejected']:>6} {counts['errors']:>5}"
+        )
+
+
+if __name__ == "__main__":
+    main()
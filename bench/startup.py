@@ -0,0 +1,109 @@
+"""
+Startup / first-request latency benchmark.
+
+    python bench/startup.py                     # offline, stub model
+    LLM_PROVIDER=openai python bench/startup.py # real upstream (needs OPENAI_API_KEY)
+
+Reports cold import cost of the pipeline modules vs the heavy libraries they now
+defer, client construction time, and first/second answer latency with and
+without the background connection pre-warm.
+"""
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from config import AppConfig
+from llm.client import build_llm_client
+from core.gatekeeper import gatekeep
+from core.task_planner import plan_tasks
+from core.clarifier import clarify_tasks_if_needed
+from core.executors import execute_tasks
+from core.composer import compose
+
+QUESTION = "Write a SQL query for revenue by segment"
+DF_SUMMARY = {
+    "rows": 20,
+    "total_columns": 3,
+    "columns": [
+        {"name": "Date", "dtype": "object"},
+        {"name": "Segment", "dtype": "object"},
+        {"name": "Revenue", "dtype": "int64"},
+    ],
+}
+
+DEFERRED = ("pandas", "numpy", "plotly", "openai")
+PIPELINE = ("config, llm.client, core.gatekeeper, core.task_planner, core.executors, core.composer, "
+            "core.fast_path, core.datasets, data_utils")
+
+
+def cold_import_ms(statement):
+    """Time an import statement in a fresh interpreter (ms)."""
+    code = (
+        "import time; t = time.perf_counter(); "
+        f"{statement}; "
+        "print((time.perf_counter() - t) * 1000)"
+    )
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True)
+    if out.returncode != 0:
+        return None
+    return float(out.stdout.strip())
+
+
+def eager_imports(statement, modules=DEFERRED):
+    """Which of the deferred libraries an import statement loads anyway (fresh interpreter)."""
+    code = f"import sys; {statement}; print(','.join(m for m in {list(modules)!r} if m in sys.modules))"
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True)
+    return [m for m in out.stdout.strip().split(",") if m]
+
+
+def answer(llm):
+    gk = gatekeep(llm, QUESTION, DF_SUMMARY)
+    plan = plan_tasks(llm, QUESTION, DF_SUMMARY)
+    clarify_tasks_if_needed(plan["tasks"], DF_SUMMARY)
+    results = execute_tasks(llm, plan["tasks"], df_summary=DF_SUMMARY)
+    return gk, compose(QUESTION, plan["tasks"], results)
+
+
+def timed(fn, *args):
+    t = time.perf_counter()
+    fn(*args)
+    return (time.perf_counter() - t) * 1000
+
+
+def main():
+    config = AppConfig.from_env()
+    if config.provider == "openai" and not config.api_key:
+        config.provider = "stub"
+
+    print(f"provider: {config.provider}")
+    print("\n== Cold imports (fresh interpreter) ==")
+    for label, stmt in [
+        ("pipeline modules", f"import {PIPELINE}"),
+        ("pandas (deferred)", "import pandas"),
+        ("openai (deferred)", "import openai"),
+    ]:
+        ms = cold_import_ms(stmt)
+        print(f"{label:<22} {'n/a' if ms is None else f'{ms:8.1f} ms'}")
+    eager = eager_imports(f"import {PIPELINE}")
+    print(f"{'loaded eagerly':<22} {', '.join(eager) if eager else 'none of ' + ', '.join(DEFERRED)}")
+
+    print("\n== First answer ==")
+    for prewarm in (False, True):
+        t = time.perf_counter()
+        llm = build_llm_client(config)
+        construct_ms = (time.perf_counter() - t) * 1000
+        if prewarm:
+            # Stand-in for the user typing their first question while the pool warms up
+            llm.prewarm().join(timeout=5)
+        first_ms = timed(answer, llm)
+        second_ms = timed(answer, llm)
+        label = "prewarmed" if prewarm else "cold"
+        print(f"{label:<10} client {construct_ms:7.1f} ms | first answer {first_ms:8.1f} ms | second answer {second_ms:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,11 @@
 import json
-from openai import OpenAI
+import re
+from concurrent.futures import Future, ThreadPoolExecutor
+
+MAX_SCORED_CHARS = 7000
+
+# Background scorer so the optional LLM confidence never blocks rendering
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="confidence")
 
 CONF_SYSTEM = """
 You are a strict evaluator of analytics answer quality.
@@ -18,20 +24,49 @@ Return STRICT JSON only:
 {"confidence": 0.0, "rationale": "short reason"}
 """.strip()
 
-def get_confidence(client: OpenAI, output: str) -> dict:
+CONF_SCHEMA = '{"confidence": 0.0, "rationale": "string"}'
+
+def condense_output(output: str, limit: int = MAX_SCORED_CHARS) -> str:
+    """Fit output into limit by trimming each '### ' section evenly (head + tail) instead of dropping later tasks."""
+    if len(output) <= limit:
+        return output
+
+    sections = [s for s in re.split(r"(?m)^(?=### )", output) if s]
+    budget = max(200, limit // max(1, len(sections)))
+    trimmed = []
+    for section in sections:
+        if len(section) > budget:
+            half = budget // 2
+            section = section[:half] + "\n[...]\n" + section[-half:]
+        trimmed.append(section)
+    return "".join(trimmed)[:limit]
+
+def _parse(obj) -> dict:
+    c = float(obj.get("confidence", 0.5))
+    r = obj.get("rationale", "No rationale provided.")
+    return {"score": max(0.0, min(1.0, c)), "rationale": r}
+
+def get_confidence_async(llm, output: str) -> Future:
+    """Score output with the LLM on a background thread; resolves to {"score", "rationale"}."""
+    def _score():
+        try:
+            return _parse(llm.json(CONF_SYSTEM, condense_output(output), CONF_SCHEMA))
+        except Exception:
+            return {"score": 0.5, "rationale": "Parsing error in confidence scoring."}
+
+    return _executor.submit(_score)
+
+def get_confidence(client, output: str) -> dict:
     resp = client.chat.completions.create(
         model="gpt-4o-mini",
         messages=[
             {"role": "system", "content": CONF_SYSTEM},
-            {"role": "user", "content": output[:7000]},
+            {"role": "user", "content": condense_output(output)},
         ],
         temperature=0,
     )
     raw = (resp.choices[0].message.content or "").strip()
     try:
-        obj = json.loads(raw)
-        c = float(obj.get("confidence", 0.5))
-        r = obj.get("rationale", "No rationale provided.")
-        return {"score": max(0.0, min(1.0, c)), "rationale": r}
+        return _parse(json.loads(raw))
     except Exception:
         return {"score": 0.5, "rationale": "Parsing error in confidence scoring."}
\ No newline at end of file
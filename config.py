@@ -7,6 +7,10 @@ class AppConfig:
     api_key: str
     model: str
     temperature: float
+    prewarm: bool = True
+    llm_confidence: bool = False
+    arrow_strings: bool = False
+    service_url: str = ""
 
     @staticmethod
     def from_env():
@@ -14,5 +18,9 @@ class AppConfig:
             provider=os.getenv("LLM_PROVIDER", "openai"),
             api_key=os.getenv("OPENAI_API_KEY", ""),
             model=os.getenv("OPENAI_MODEL", "gpt-4o-mini"),
-            temperature=float(os.getenv("TEMPERATURE", "0.1"))
+            temperature=float(os.getenv("TEMPERATURE", "0.1")),
+            prewarm=os.getenv("LLM_PREWARM", "1").lower() not in {"0", "false", "no"},
+            llm_confidence=os.getenv("LLM_CONFIDENCE", "0").lower() in {"1", "true", "yes"},
+            arrow_strings=os.getenv("ARROW_STRINGS", "0").lower() in {"1", "true", "yes"},
+            service_url=os.getenv("COPILOT_SERVICE_URL", "")
         )
@@ -2,5 +2,6 @@ SUPPORTED = {
     "BUSINESS_STRATEGY",
     "PRODUCT_ANALYTICS",
     "SQL_INVESTIGATION",
-    "PANDAS_TRANSFORM"
+    "PANDAS_TRANSFORM",
+    "VISUALIZATION"
 }
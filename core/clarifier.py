@@ -24,6 +24,10 @@ def clarify_tasks_if_needed(
             if not df_summary:
                 hard_questions.append("For pandas tasks, please upload a CSV or describe the dataframe structure.")
 
+        elif intent == "VISUALIZATION":
+            if not df_summary:
+                hard_questions.append("For charts, please upload a CSV to plot.")
+
         # Everything else never blocks
         else:
             continue
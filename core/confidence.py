@@ -0,0 +1,67 @@
+from typing import Optional, Dict, Any, List
+
+# Defaults / weights for the local estimator
+DEFAULT_PLANNER_CONFIDENCE = 0.7
+OPTIONAL_QUESTION_PENALTY = 0.05
+UNSUPPORTED_TASK_PENALTY = 0.05
+WARNING_PENALTY = 0.05
+FAILURE_PENALTY = 0.3
+MIN_SCHEMA_COVERAGE = 0.8
+
+def estimate_confidence(
+    plan: Dict[str, Any],
+    results: List[Dict[str, Any]],
+    gk: Optional[Dict[str, Any]] = None,
+    df_summary: Optional[Any] = None
+) -> Dict[str, Any]:
+    """
+    Score an answer locally from signals the pipeline already produced (no LLM round trip).
+    Mirrors the caps of the LLM scorer in confidence.CONF_SYSTEM.
+    """
+    score = _clamp(plan.get("confidence") or DEFAULT_PLANNER_CONFIDENCE)
+    cap = 0.95
+    reasons: List[str] = [f"planner confidence {score:.2f}"]
+
+    questions = (gk or {}).get("questions") or []
+    if questions:
+        score -= min(0.15, OPTIONAL_QUESTION_PENALTY * len(questions))
+        cap = min(cap, 0.85)
+        reasons.append(f"{len(questions)} optional question(s) left unanswered")
+
+    tasks = plan.get("tasks", [])
+    unsupported = [t for t in tasks if not t.get("supported", False)]
+    if unsupported:
+        score -= UNSUPPORTED_TASK_PENALTY * len(unsupported)
+        reasons.append(f"{len(unsupported)} unsupported task(s) not answered")
+
+    failures = [r for r in results if r.get("metadata", {}).get("error")]
+    if results and failures:
+        score -= FAILURE_PENALTY * len(failures) / len(results)
+        reasons.append(f"{len(failures)} of {len(results)} task(s) failed")
+
+    # Warnings are full sentences; drop their periods so they join cleanly into one rationale
+    warnings = [str(w).strip().rstrip(".") for r in results for w in r.get("metadata", {}).get("warnings", [])]
+    if warnings:
+        score -= min(0.2, WARNING_PENALTY * len(warnings))
+        reasons.append(f"{len(warnings)} validator warning(s): " + "; ".join(warnings[:3]))
+
+    sql_tasks = [t for t in tasks if t.get("supported", False) and t.get("intent") == "SQL_INVESTIGATION"]
+    if sql_tasks and not df_summary:
+        cap = min(cap, 0.75)
+        reasons.append("SQL written without a schema")
+
+    for r in results:
+        coverage = r.get("metadata", {}).get("schema_coverage")
+        if coverage is not None and coverage < MIN_SCHEMA_COVERAGE:
+            score -= (MIN_SCHEMA_COVERAGE - coverage) * 0.5
+            reasons.append(f"SQL schema coverage {coverage:.0%}")
+
+    if len(reasons) == 1:
+        cap = 1.0
+        reasons.append("no warnings, failures or open questions")
+
+    rationale = "; ".join(reasons)
+    return {"score": round(_clamp(min(score, cap)), 2), "rationale": rationale[:1].upper() + rationale[1:] + "."}
+
+def _clamp(value) -> float:
+    return max(0.0, min(1.0, float(value)))
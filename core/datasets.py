@@ -0,0 +1,106 @@
+import re
+from dataclasses import dataclass, field, replace
+from typing import TYPE_CHECKING, Optional, Dict, Any, List
+
+if TYPE_CHECKING:
+    import pandas as pd
+    from data.rollups import RollupCube
+    from data.join_discovery import ColumnSketch
+
+
+@dataclass
+class Dataset:
+    name: str
+    df: "pd.DataFrame"
+    summary: Dict[str, Any]
+    cube: Optional["RollupCube"] = None
+    version: str = ""
+    stats: Dict[str, Any] = field(default_factory=dict)
+    sketches: List["ColumnSketch"] = field(default_factory=list)
+
+
+@dataclass
+class DatasetCatalog:
+    """The tables uploaded in one session plus the join keys discovered between them."""
+    datasets: Dict[str, Dataset] = field(default_factory=dict)
+    relationships: List[Dict[str, Any]] = field(default_factory=list)
+    primary: Optional[str] = None
+
+    @property
+    def primary_dataset(self) -> Optional[Dataset]:
+        return self.datasets.get(self.primary) if self.primary else None
+
+    @property
+    def versions(self) -> Dict[str, str]:
+        return {name: d.version for name, d in self.datasets.items()}
+
+    def summary(self) -> Optional[Dict[str, Any]]:
+        """One table's profile as-is; several tables as {"tables": {name: profile}}."""
+        if not self.datasets:
+            return None
+        if len(self.datasets) == 1:
+            return self.primary_dataset.summary
+        return {"tables": {name: d.summary for name, d in self.datasets.items()}}
+
+
+def table_name(filename: str) -> str:
+    """SQL-safe table name from an upload filename ("Customer Events.csv" -> "customer_events")."""
+    stem = re.sub(r"\.[^.]+$", "", filename or "")
+    name = re.sub(r"[^0-9a-zA-Z_]+", "_", stem).strip("_").lower()
+    return name if name and not name[0].isdigit() else f"t_{name or 'dataset'}"
+
+
+def register_dataset(name: str, df: "pd.DataFrame", optimize: bool = True, arrow_strings: bool = False) -> Dataset:
+    """
+    Compact the frame's dtypes, profile it, precompute its rollup cube (the fast path for
+    simple KPI questions) and sketch its candidate key columns for join discovery.
+    """
+    import time
+    from data_utils import dataset_fingerprint, optimize_dtypes, summarize_df
+    from data.rollups import build_cube
+    from data.join_discovery import sketch_table
+
+    stats: Dict[str, Any] = {}
+    if optimize:
+        df, memory = optimize_dtypes(df, arrow_strings=arrow_strings)
+        stats["memory"] = memory
+
+    start = time.perf_counter()
+    cube = build_cube(df)
+    stats["cube_build_ms"] = round((time.perf_counter() - start) * 1000, 1)
+
+    start = time.perf_counter()
+    sketches = sketch_table(df)
+    stats["sketch_ms"] = round((time.perf_counter() - start) * 1000, 1)
+
+    return Dataset(
+        name=table_name(name),
+        df=df,
+        summary=summarize_df(df),
+        cube=cube,
+        version=dataset_fingerprint(df),
+        stats=stats,
+        sketches=sketches
+    )
+
+
+def build_catalog(datasets: List[Dataset], primary: Optional[str] = None) -> DatasetCatalog:
+    """
+    Name the session's tables (suffixing duplicates) and discover join keys between them from
+    the per-column sketches built at upload time.
+    """
+    from data.join_discovery import discover_relationships
+
+    named: Dict[str, Dataset] = {}
+    for d in datasets:
+        name, n = d.name, 2
+        while name in named:
+            name, n = f"{d.name}_{n}", n + 1
+        named[name] = d if name == d.name else replace(d, name=name)
+
+    relationships = discover_relationships({name: d.sketches for name, d in named.items()}) if len(named) > 1 else []
+    return DatasetCatalog(
+        datasets=named,
+        relationships=relationships,
+        primary=primary if primary in named else next(iter(named), None)
+    )
@@ -1,24 +1,43 @@
-from typing import Optional, List, Dict, Any
-import pandas as pd
+from typing import TYPE_CHECKING, Optional, List, Dict, Any
 
 from llm.client import LLMClient
 from prompts.sql import build_sql_prompt
-from prompts.product import build_product_prompt, build_pandas_prompt
+from prompts.product import build_product_prompt, build_pandas_prompt, build_pandas_fix_prompt
 from prompts.business import build_business_prompt
+from prompts.viz import build_viz_prompt
+from llm.schemas import VIZ_SCHEMA
 
-from validators.sql_validator import validate_sql
+from validators.sql_validator import validate_sql, schema_coverage
+from validators.sql_cost import lint_sql_cost
+from validators.business_validator import validate_business
+from validators.product_validator import validate_product
+from validators.pandas_validator import review_pandas_code, needs_regeneration
 from validators.text_validator import validate_readable_text
 
+from data_utils import dataset_fingerprint, markdown_table
+
+if TYPE_CHECKING:
+    import pandas as pd
+    from core.datasets import DatasetCatalog
+
+SQL_PREVIEW_ROWS = 20
+
 
 def execute_tasks(
     llm: LLMClient,
     tasks: List[Dict[str, Any]],
     df_summary: Optional[str] = None,
-    df: Optional[pd.DataFrame] = None,
+    df: Optional["pd.DataFrame"] = None,
+    dataset_version: Optional[str] = None,
+    catalog: Optional["DatasetCatalog"] = None,
 ) -> List[Dict[str, Any]]:
 
     results: List[Dict[str, Any]] = []
 
+    # Several uploaded tables: per-table profiles for linting/execution, discovered join keys for the prompts
+    multi = catalog is not None and len(catalog.datasets) > 1
+    relationships = catalog.relationships if multi else None
+
     for task in tasks:
 
         # Skip unsupported tasks
@@ -35,7 +54,7 @@ def execute_tasks(
             # ----------------------------------------
             if intent == "SQL_INVESTIGATION":
 
-                prompt = build_sql_prompt(question, df_summary)
+                prompt = build_sql_prompt(question, df_summary, relationships)
 
                 sql_output = llm.text(
                     system="You are a senior analytics engineer. Return only SQL.",
@@ -44,10 +63,40 @@ def execute_tasks(
 
                 validated_sql = validate_sql(sql_output, df_summary)
 
+                warnings = []
+                if validated_sql != sql_output:
+                    warnings.append("Possible schema mismatch detected.")
+
+                # Cost lint on a stats-only sqlite replica before the query runs anywhere expensive
+                if multi:
+                    cost = lint_sql_cost(validated_sql, tables={n: d.summary for n, d in catalog.datasets.items()})
+                else:
+                    cost = lint_sql_cost(validated_sql, df_summary)
+
+                output = f"```sql\n{validated_sql}\n```" + _format_cost_report(cost)
+                metadata = {
+                    "warnings": warnings,
+                    "schema_coverage": schema_coverage(sql_output, df_summary),
+                    "cost": cost
+                }
+
+                # Run locally (result-cached) unless the plan looks like it would blow up
+                if (df is not None or multi) and not any(f["severity"] == "high" for f in cost["findings"]):
+                    if multi:
+                        preview, execution = _run_sql_on_catalog(validated_sql, catalog)
+                    else:
+                        preview, execution = _run_sql_locally(validated_sql, df, dataset_version)
+                    metadata["execution"] = execution
+                    if preview is not None:
+                        output += f"\n\n**Result** ({execution['rows']:,} rows, {execution['elapsed_ms']:.0f} ms"
+                        output += ", cached)\n\n" if execution["cache_hit"] else ")\n\n"
+                        output += markdown_table(preview, SQL_PREVIEW_ROWS)
+
                 results.append({
                     "id": task["id"],
                     "intent": intent,
-                    "output": f"```sql\n{validated_sql}\n```"
+                    "output": output,
+                    "metadata": metadata
                 })
 
             # ----------------------------------------
@@ -63,11 +112,13 @@ def execute_tasks(
                 )
 
                 cleaned = validate_readable_text(output)
+                ok, message = validate_product(cleaned)
 
                 results.append({
                     "id": task["id"],
                     "intent": intent,
-                    "output": cleaned
+                    "output": cleaned,
+                    "metadata": {"warnings": [] if ok else [message]}
                 })
 
             # ----------------------------------------
@@ -83,11 +134,13 @@ def execute_tasks(
                 )
 
                 cleaned = validate_readable_text(output)
+                ok, message = validate_business(cleaned)
 
                 results.append({
                     "id": task["id"],
                     "intent": intent,
-                    "output": cleaned
+                    "output": cleaned,
+                    "metadata": {"warnings": [] if ok else [message]}
                 })
 
             # ----------------------------------------
@@ -95,17 +148,78 @@ def execute_tasks(
             # ----------------------------------------
             elif intent == "PANDAS_TRANSFORM":
 
-                prompt = build_pandas_prompt(question, df_summary)
+                prompt = build_pandas_prompt(question, df_summary, relationships)
 
-                output = llm.text(
-                    system="You are a Python data engineer. Return only pandas code.",
-                    user=prompt
-                ).strip()
+                system = "You are a Python data engineer. Return only pandas code."
+                if multi:
+                    n_rows = max(len(d.df) for d in catalog.datasets.values())
+                    frames = {"df", *catalog.datasets}
+                else:
+                    n_rows = _row_count(df, df_summary)
+                    frames = {"df"}
+
+                code = _strip_code_fences(llm.text(system=system, user=prompt))
+                code, findings, rewrites = review_pandas_code(code, n_rows, frames)
+
+                # Anti-patterns we can't rewrite safely and that are too slow at this size: one targeted retry
+                slow = needs_regeneration(findings)
+                if slow:
+                    retry = _strip_code_fences(llm.text(
+                        system=system,
+                        user=build_pandas_fix_prompt(question, code, slow, df_summary, relationships)
+                    ))
+                    code, findings, more_rewrites = review_pandas_code(retry, n_rows, frames)
+                    rewrites += more_rewrites
+
+                results.append({
+                    "id": task["id"],
+                    "intent": intent,
+                    "output": f"```python\n{code}\n```",
+                    "metadata": {
+                        "findings": findings,
+                        "rewrites": rewrites,
+                        "regenerated": bool(slow),
+                        "regenerated_for": [f["rule"] for f in slow],
+                        "warnings": [f["message"] for f in needs_regeneration(findings)]
+                    }
+                })
+
+            # ----------------------------------------
+            # VISUALIZATION
+            # ----------------------------------------
+            elif intent == "VISUALIZATION":
+
+                if df is None:
+                    raise ValueError("Visualization needs an uploaded dataset.")
+
+                # Model picks the chart; we aggregate + downsample server-side so payloads stay bounded
+                from data.charts import build_chart
+
+                # Charts are drawn from the primary table
+                schema = catalog.primary_dataset.summary if multi else df_summary
+                spec = llm.json(
+                    "You are a data visualization expert. Return a chart spec as JSON.",
+                    build_viz_prompt(question, schema, df.head(5).to_dict(orient="records")),
+                    VIZ_SCHEMA
+                )
+                chart = build_chart(df, spec)
+                stats = chart["stats"]
 
                 results.append({
                     "id": task["id"],
                     "intent": intent,
-                    "output": f"```python\n{output}\n```"
+                    "output": (
+                        f"**{chart['spec']['title'] or 'Chart'}** ({chart['spec']['chart']}, {chart['spec']['agg']} of "
+                        f"{chart['spec']['y'] or 'rows'} by {chart['spec']['x']})\n\n"
+                        f"_Rendered {stats['points_out']:,} points from {stats['rows_in']:,} rows in "
+                        f"{stats['render_ms']:.0f} ms; payload {stats['payload_bytes'] / 1024:.1f} KB._"
+                    ),
+                    "metadata": {
+                        "figure": chart["figure"],
+                        "chart": chart["spec"],
+                        "render": stats,
+                        "warnings": []
+                    }
                 })
 
             # ----------------------------------------
@@ -118,7 +232,56 @@ def execute_tasks(
             results.append({
                 "id": task.get("id", "unknown"),
                 "intent": intent,
-                "output": f"Error executing task: {str(e)}"
+                "output": f"Error executing task: {str(e)}",
+                "metadata": {"error": str(e)}
             })
 
     return results
+
+
+def _strip_code_fences(text: str) -> str:
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1] if "\n" in text else ""
+        if text.rstrip().endswith("```"):
+            text = text.rstrip()[:-3]
+    return text.strip()
+
+
+def _row_count(df, df_summary) -> Optional[int]:
+    if df is not None:
+        return len(df)
+    if isinstance(df_summary, dict) and "rows" in df_summary:
+        return int(df_summary["rows"])
+    return None
+
+
+def _format_cost_report(cost: Dict[str, Any]) -> str:
+    notable = [f["message"] for f in cost["findings"] if f["severity"] != "low"]
+    if not notable and not cost["index_suggestions"]:
+        return ""
+
+    out = "\n\n**Query cost check**\n"
+    out += "".join(f"- {msg}\n" for msg in notable)
+    if cost["index_suggestions"]:
+        out += "\nSuggested indexes:\n```sql\n" + "\n".join(cost["index_suggestions"]) + "\n```"
+    return out
+
+
+def _run_sql_locally(sql: str, df, dataset_version: Optional[str]):
+    from data.sql_runner import DEFAULT_TABLE, run_query
+
+    version = dataset_version or dataset_fingerprint(df)
+    try:
+        return run_query(sql, {DEFAULT_TABLE: df}, {DEFAULT_TABLE: version})
+    except Exception as e:
+        return None, {"error": str(e), "cache_hit": False}
+
+
+def _run_sql_on_catalog(sql: str, catalog: "DatasetCatalog"):
+    from data.sql_runner import run_query
+
+    try:
+        return run_query(sql, {n: d.df for n, d in catalog.datasets.items()}, catalog.versions)
+    except Exception as e:
+        return None, {"error": str(e), "cache_hit": False}
@@ -0,0 +1,183 @@
+import re
+import time
+from typing import Optional, Dict, Any, List
+
+from data_utils import markdown_table
+
+MAX_QUESTION_WORDS = 16
+MAX_TABLE_ROWS = 200
+
+# Anything that needs reasoning, code, filtering we can't express, or a chart goes to the LLM path
+_NOT_SIMPLE = re.compile(
+    r"\b(why|how come|should|recommend\w*|strateg\w*|explain|sql|query|pandas|code|python|predict\w*|forecast\w*|"
+    r"correlat\w*|cohort\w*|funnel\w*|chart|plot|graph|visuali[sz]\w*|top|bottom|rank\w*|exclud\w*|except|between|"
+    r"since|before|after|last|previous|growth|change|vs|versus|ratio|percent\w*|share|per user|per customer|"
+    # Negations and calendar filters the cube can't apply
+    r"not|no|without|excluding|other than|"
+    r"jan(uary)?|feb(ruary)?|mar(ch)?|apr(il)?|may|june?|july?|aug(ust)?|sep(t|tember)?|oct(ober)?|nov(ember)?|dec(ember)?|"
+    r"q[1-4]|quarter\w*|year\w*|annual\w*|ytd|mtd|today|yesterday|tomorrow)\b|%|\d"
+)
+
+_AGG_WORDS = {
+    "mean": ("average", "avg", "mean"),
+    "max": ("max", "maximum", "highest", "peak", "largest"),
+    "min": ("min", "minimum", "lowest", "smallest"),
+    "sum": ("total", "sum", "overall"),
+}
+_MEAN_MEASURE_HINTS = {"avg", "average", "mean", "rate", "ratio", "pct", "percent", "duration", "score"}
+# Measures safe to sum across days (flows). Anything else, and any snapshot-like name (active users,
+# balances), is point-in-time: summing it over days double-counts, so it only gets a daily total
+_ADDITIVE_HINTS = {
+    "revenue", "sale", "amount", "cost", "spend", "profit", "income", "fee", "tax", "gmv", "booking",
+    "count", "churn", "order", "click", "event", "session", "signup", "unit", "quantity", "qty", "volume",
+    "transaction", "purchase", "conversion", "install", "view", "impression", "visit", "refund",
+}
+_SNAPSHOT_HINTS = {"active", "user", "customer", "account", "subscriber", "balance", "inventory", "stock", "headcount", "level"}
+# Measure-name tokens too generic to identify a measure on their own
+_GENERIC_TOKENS = {"avg", "mean", "sum", "total", "count", "num", "number", "min", "max", "id", "value", "amount"}
+_ROW_COUNT = re.compile(r"\bhow many (rows|records|events|entries)\b|\b(row|record) count\b")
+
+_GRAIN_WORDS = {
+    "day": (r"\bdaily\b", r"\b(by|per|each) day\b", r"\bby date\b"),
+    "week": (r"\bweekly\b", r"\b(by|per|each) week\b"),
+    "month": (r"\bmonthly\b", r"\b(by|per|each) month\b"),
+}
+_TREND = re.compile(r"\b(trend\w*|over time|time series)\b")
+
+_FILLER = (
+    "what", "whats", "is", "are", "was", "were", "the", "a", "an", "of", "for", "by", "per", "and", "in", "on",
+    "show", "me", "give", "list", "get", "each", "across", "our", "my", "all", "to", "with", "broken", "down",
+    "split", "how", "many", "row", "record", "event", "entrie", "entry", "trend", "over", "time", "serie",
+    "daily", "weekly", "monthly", "day", "week", "month", "date", "please", "tell", "compare", "breakdown",
+)
+
+
+def answer_from_cube(question: str, cube) -> Optional[Dict[str, Any]]:
+    """
+    Answer a plain "metric by dimension" question from the rollup cube, or None to fall back
+    to the gatekeeper -> planner -> executor path.
+    """
+    if cube is None:
+        return None
+    spec = match_question(question, cube)
+    if spec is None:
+        return None
+
+    start = time.perf_counter()
+    table = cube.query(spec["measure"], spec["agg"], tuple(spec["dims"]), spec["grain"], spec["filters"])
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    return {
+        "output": _render(spec, table, elapsed_ms),
+        "table": table,
+        "spec": spec,
+        "elapsed_ms": round(elapsed_ms, 2),
+    }
+
+
+def match_question(question: str, cube) -> Optional[Dict[str, Any]]:
+    low = question.lower().strip()
+    if len(low.split()) > MAX_QUESTION_WORDS or _NOT_SIMPLE.search(low):
+        return None
+
+    words = _norm(low)
+    used: set = set()
+
+    # Measure (or plain row count)
+    measure = None
+    if not _ROW_COUNT.search(low):
+        measure = _match_measure(words, cube.measures)
+        if measure is None:
+            return None
+        used |= set(_norm(measure))
+
+    rest = [w for w in words if w not in used]
+    agg = next((a for a, ws in _AGG_WORDS.items() if any(w in rest for w in ws)), None)
+    if measure is None:
+        agg = "count"
+    elif agg is None:
+        agg = "mean" if set(_norm(measure)) & _MEAN_MEASURE_HINTS else "sum"
+
+    # Dimension values mentioned verbatim become filters; dimension names become group-by keys
+    filters: Dict[str, str] = {}
+    for dim, values in cube.dim_values.items():
+        for value in values:
+            tokens = _norm(value)
+            if tokens and _contains(words, tokens) and not set(tokens) <= used:
+                filters[dim] = value
+                break
+    dims = [d for d in cube.dims if d not in filters and _contains(words, _norm(d))]
+
+    grain = None
+    if cube.time_col:
+        grain = next((g for g, pats in _GRAIN_WORDS.items() if any(re.search(p, low) for p in pats)), None)
+        if grain is None and _TREND.search(low):
+            # Imported here: data.rollups pulls in pandas, which app startup defers
+            from data.rollups import grain_for_span
+            grain = grain_for_span(cube.time_span_days)
+
+    if agg == "sum" and cube.time_col and grain != "day" and not _is_additive(measure):
+        return None
+
+    # Any unexplained content word ("poem", a filter we don't know) means it's not a plain KPI lookup
+    known = set(_FILLER) | used | {w for ws in _AGG_WORDS.values() for w in ws}
+    known |= {t for d in cube.dims for t in _norm(d)} | {t for v in filters.values() for t in _norm(v)}
+    known |= set(_norm(cube.time_col or ""))
+    if any(w not in known for w in words):
+        return None
+
+    return {"measure": measure, "agg": agg, "dims": dims, "grain": grain, "filters": filters}
+
+
+def _match_measure(words: List[str], measures: List[str]) -> Optional[str]:
+    full, partial = [], []
+    for m in measures:
+        tokens = _norm(m)
+        if _contains(words, tokens):
+            full.append(m)
+        elif any(t in words for t in tokens if t not in _GENERIC_TOKENS):
+            partial.append(m)
+
+    # A measure named inside a longer one ("session" in "avg session duration") is the same mention
+    named = full + partial
+    mentioned = [
+        m for m in named
+        if not any(o != m and o in full and set(_norm(m)) < set(_norm(o)) for o in named)
+    ]
+    # Two different measures ("revenue per active user") is a derived metric, not a lookup
+    if len(mentioned) != 1:
+        return None
+    return mentioned[0]
+
+
+def _norm(text: str) -> List[str]:
+    words = re.sub(r"[^a-z0-9]+", " ", str(text).lower()).split()
+    synonyms = {"average": "avg", "users": "user", "customers": "customer", "accounts": "account"}
+    return [synonyms.get(w, w[:-1] if len(w) > 3 and w.endswith("s") and not w.endswith("ss") else w) for w in words]
+
+
+def _is_additive(measure: Optional[str]) -> bool:
+    if measure is None:
+        return True
+    tokens = set(_norm(measure))
+    return bool(tokens & _ADDITIVE_HINTS) and not tokens & _SNAPSHOT_HINTS
+
+
+def _contains(words: List[str], tokens: List[str]) -> bool:
+    return bool(tokens) and all(t in words for t in tokens)
+
+
+def _render(spec: Dict[str, Any], table, elapsed_ms: float) -> str:
+    agg_label = {"sum": "Total", "mean": "Average", "min": "Minimum", "max": "Maximum", "count": "Row count"}[spec["agg"]]
+    title = agg_label + (f" {spec['measure']}" if spec["measure"] else "")
+    if spec["dims"]:
+        title += " by " + ", ".join(spec["dims"])
+    if spec["grain"]:
+        title += f" ({spec['grain']}ly)" if spec["grain"] != "day" else " (daily)"
+    if spec["filters"]:
+        title += " where " + ", ".join(f"{k} = {v}" for k, v in spec["filters"].items())
+
+    out = "### Quick answer (precomputed rollup)\n"
+    out += f"**{title}**\n\n{markdown_table(table, MAX_TABLE_ROWS)}\n\n"
+    out += f"_Answered from the rollup cube in {elapsed_ms:.1f} ms without calling the model._\n"
+    return out
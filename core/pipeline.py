@@ -0,0 +1,90 @@
+from typing import TYPE_CHECKING, Optional, Callable, Dict, Any
+
+from core.gatekeeper import gatekeep
+from core.task_planner import plan_tasks
+from core.clarifier import clarify_tasks_if_needed
+from core.executors import execute_tasks
+from core.composer import compose
+from core.confidence import estimate_confidence
+from core.fast_path import answer_from_cube
+
+if TYPE_CHECKING:
+    from core.datasets import DatasetCatalog
+
+
+def run_pipeline(
+    llm,
+    question: str,
+    catalog: Optional["DatasetCatalog"] = None,
+    context: str = "",
+    emit: Optional[Callable[[str, Dict[str, Any]], None]] = None
+) -> Dict[str, Any]:
+    """
+    Fast path -> gatekeep -> plan -> clarify -> execute -> compose -> confidence, headless.
+
+    emit(stage, payload) is called as each stage finishes (tasks are executed one at a time so
+    results can be streamed). Returns the final payload with status "fast_path", "refused",
+    "needs_clarification" or "answered".
+    """
+    emit = emit or (lambda stage, payload: None)
+
+    dataset = catalog.primary_dataset if catalog else None
+    df_summary = catalog.summary() if catalog else None
+
+    # 0) Plain metric-by-dimension questions straight from the rollup cube
+    quick = answer_from_cube(question, dataset.cube) if dataset else None
+    if quick:
+        final = {"status": "fast_path", "answer": quick["output"], "table": quick["table"], "elapsed_ms": quick["elapsed_ms"]}
+        emit("final", final)
+        return final
+
+    enriched = question
+    if context.strip():
+        enriched += "\n\nAdditional context from earlier clarifications:\n" + context
+
+    # 1) Gatekeeper
+    gk = gatekeep(llm, enriched, df_summary)
+    emit("gatekeep", gk)
+    if gk["decision"] == "REFUSE":
+        final = {"status": "refused", "message": gk.get("message") or "Out of scope.", "gatekeep": gk}
+        emit("final", final)
+        return final
+    if gk["decision"] == "ASK" and gk.get("blocking", False):
+        final = {"status": "needs_clarification", "questions": gk.get("questions", []), "gatekeep": gk}
+        emit("final", final)
+        return final
+
+    # 2) Plan + 3) clarify (hard blocking only for SQL/pandas/charts without data)
+    plan = plan_tasks(llm, enriched, df_summary)
+    emit("plan", plan)
+
+    clarification = clarify_tasks_if_needed(plan["tasks"], df_summary)
+    if clarification["needs_hard_clarification"]:
+        final = {"status": "needs_clarification", "questions": clarification["hard_questions"], "plan": plan}
+        emit("final", final)
+        return final
+
+    # 4) Execute, one task at a time so each result can be streamed as soon as it exists
+    results = []
+    for task in plan["tasks"]:
+        for result in execute_tasks(
+            llm, [task], df_summary=df_summary, df=dataset.df if dataset else None,
+            dataset_version=dataset.version if dataset else None, catalog=catalog
+        ):
+            results.append(result)
+            emit("result", result)
+
+    # 5) Compose + 6) local confidence
+    answer = compose(question, plan["tasks"], results)
+    confidence = estimate_confidence(plan, results, gk=gk, df_summary=df_summary)
+
+    final = {
+        "status": "answered",
+        "answer": answer,
+        "confidence": confidence,
+        "gatekeep": gk,
+        "plan": plan,
+        "results": results,
+    }
+    emit("final", final)
+    return final
@@ -0,0 +1,169 @@
+import time
+from typing import Optional, Dict, Any, List
+
+import pandas as pd
+
+from data.downsample import lttb
+from data.rollups import bucket_dates, grain_for_span
+
+MAX_POINTS_PER_TRACE = 5000
+MAX_CATEGORIES = 50
+MAX_TRACES = 20
+CHART_TYPES = {"line", "bar", "scatter", "pie"}
+AGGS = {"sum", "mean", "count", "min", "max"}
+
+
+def build_chart(df: pd.DataFrame, spec: Dict[str, Any], max_points: int = MAX_POINTS_PER_TRACE) -> Dict[str, Any]:
+    """
+    Render a chart spec (chart/x/y/color/agg/time_grain/title) against df.
+
+    Everything heavy happens here on the server: group-by aggregation to one point per x (per
+    color), top-N capping for categories, then LTTB (lines) or sampling (scatter) so each trace
+    carries at most max_points. Returns the Plotly figure plus payload/timing stats.
+    """
+    start = time.perf_counter()
+    spec = _normalize_spec(df, spec)
+    data = aggregate_for_chart(df, spec)
+    data = downsample_for_chart(data, spec, max_points)
+    prep_ms = (time.perf_counter() - start) * 1000
+
+    fig = _figure(data, spec)
+    payload = fig.to_json()
+    render_ms = (time.perf_counter() - start) * 1000
+
+    return {
+        "figure": fig,
+        "spec": spec,
+        "stats": {
+            "rows_in": int(len(df)),
+            "points_out": int(len(data)),
+            "traces": int(data[spec["color"]].nunique()) if spec["color"] else 1,
+            "payload_bytes": len(payload.encode("utf-8")),
+            "prep_ms": round(prep_ms, 1),
+            "render_ms": round(render_ms, 1),
+        },
+    }
+
+
+def aggregate_for_chart(df: pd.DataFrame, spec: Dict[str, Any]) -> pd.DataFrame:
+    x, y, color, agg = spec["x"], spec["y"], spec["color"], spec["agg"]
+    cols = [c for c in (x, y, color) if c]
+    frame = df[list(dict.fromkeys(cols))]
+
+    if spec["chart"] == "scatter":
+        return frame.dropna(subset=[c for c in (x, y) if c])
+
+    if spec["x_is_time"]:
+        frame = frame.assign(**{x: _to_datetime(frame[x])})
+        if not spec["time_grain"] and spec["chart"] in ("bar", "pie"):
+            # Bars can't be thinned like a line (sampling drops arbitrary periods): bucket by the span instead
+            span = frame[x].max() - frame[x].min()
+            spec["time_grain"] = grain_for_span(span.days if pd.notna(span) else 0)
+        if spec["time_grain"]:
+            frame = frame.assign(**{x: bucket_dates(frame[x].dt.floor("D"), spec["time_grain"])})
+
+    if y and agg == "sum" and pd.api.types.is_numeric_dtype(frame[y]):
+        # Widen downcast ints/floats before summing
+        frame = frame.assign(**{y: frame[y].astype("int64" if pd.api.types.is_integer_dtype(frame[y]) else "float64")})
+
+    keys = [x] + ([color] if color else [])
+    grouped = frame.groupby(keys, observed=True, dropna=True, sort=False)
+    if agg == "count" or not y:
+        out = grouped.size().rename(y or "count").reset_index()
+    else:
+        out = grouped[y].agg(agg).reset_index()
+    value = y or "count"
+
+    if color and out[color].nunique() > MAX_TRACES:
+        top = out.groupby(color, observed=True)[value].sum().nlargest(MAX_TRACES).index
+        out = out[out[color].isin(top)]
+
+    if spec["chart"] in ("bar", "pie") and not spec["x_is_time"] and out[x].nunique() > MAX_CATEGORIES:
+        top = out.groupby(x, observed=True)[value].sum().nlargest(MAX_CATEGORIES).index
+        out = out[out[x].isin(top)]
+
+    return out.sort_values(keys).reset_index(drop=True)
+
+
+def downsample_for_chart(data: pd.DataFrame, spec: Dict[str, Any], max_points: int) -> pd.DataFrame:
+    x, color = spec["x"], spec["color"]
+    y = spec["y"] or "count"
+    groups = [g for _, g in data.groupby(color, observed=True, sort=False)] if color else [data]
+
+    parts: List[pd.DataFrame] = []
+    for g in groups:
+        if len(g) <= max_points:
+            parts.append(g)
+        elif spec["chart"] == "line":
+            if spec["x_is_time"]:
+                xs = g[x].astype("int64").to_numpy()
+            elif pd.api.types.is_numeric_dtype(g[x]):
+                xs = g[x].to_numpy()
+            else:
+                xs = range(len(g))
+            parts.append(g.iloc[lttb(xs, g[y].to_numpy(), max_points)])
+        else:
+            parts.append(g.sample(n=max_points, random_state=0).sort_index())
+    return pd.concat(parts, ignore_index=True) if parts else data
+
+
+def _normalize_spec(df: pd.DataFrame, spec: Dict[str, Any]) -> Dict[str, Any]:
+    lookup = {str(c).lower(): c for c in df.columns}
+
+    def col(name) -> Optional[str]:
+        if not name or str(name).lower() in {"null", "none", ""}:
+            return None
+        if str(name).lower() not in lookup:
+            raise ValueError(f"Column '{name}' is not in the dataset.")
+        return lookup[str(name).lower()]
+
+    chart = str(spec.get("chart", "line")).lower()
+    agg = str(spec.get("agg") or "sum").lower()
+    grain = spec.get("time_grain")
+    out = {
+        "chart": chart if chart in CHART_TYPES else "line",
+        "x": col(spec.get("x")),
+        "y": col(spec.get("y")),
+        "color": col(spec.get("color")),
+        "agg": agg if agg in AGGS else "sum",
+        "time_grain": grain if grain in ("day", "week", "month") else None,
+        "title": spec.get("title") or "",
+    }
+    if out["x"] is None:
+        raise ValueError("Chart spec has no x column.")
+    if out["chart"] == "scatter" and out["y"] is None:
+        raise ValueError("Scatter charts need a y column.")
+    if out["y"] is not None and not pd.api.types.is_numeric_dtype(df[out["y"]]):
+        out["agg"] = "count"
+    out["x_is_time"] = _is_time(df[out["x"]])
+    return out
+
+
+def _is_time(s: pd.Series) -> bool:
+    if pd.api.types.is_datetime64_any_dtype(s):
+        return True
+    if pd.api.types.is_object_dtype(s) or pd.api.types.is_string_dtype(s):
+        sample = s.dropna().astype(str).head(50)
+        return not sample.empty and sample.str.contains(r"\d").all() and pd.to_datetime(sample, errors="coerce").notna().mean() >= 0.9
+    return False
+
+
+def _to_datetime(s: pd.Series) -> pd.Series:
+    return s if pd.api.types.is_datetime64_any_dtype(s) else pd.to_datetime(s, errors="coerce")
+
+
+def _figure(data: pd.DataFrame, spec: Dict[str, Any]):
+    # Plotly is only imported when a chart is actually rendered
+    import plotly.express as px
+
+    y = spec["y"] or "count"
+    kwargs = {"title": spec["title"], "template": "plotly_white"}
+    if spec["chart"] == "pie":
+        return px.pie(data, names=spec["x"], values=y, **kwargs)
+
+    plot = {"line": px.line, "bar": px.bar, "scatter": px.scatter}[spec["chart"]]
+    if spec["color"]:
+        kwargs["color"] = spec["color"]
+    if spec["chart"] in ("line", "scatter") and len(data) > 1000:
+        kwargs["render_mode"] = "webgl"
+    return plot(data, x=spec["x"], y=y, **kwargs)
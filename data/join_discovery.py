@@ -0,0 +1,135 @@
+import re
+from dataclasses import dataclass
+from typing import Dict, Any, List
+
+import pandas as pd
+
+from data.sketches import BloomFilter, HyperLogLog, MinHash, containment, hash_values
+
+MIN_CONTAINMENT = 0.8
+# Without a name match the FK must also cover a decent share of the PK, else any small-int column
+# (employees, quantity) looks "contained" in a dense id sequence
+MIN_UNNAMED_COVERAGE = 0.1
+MIN_KEY_DISTINCT = 20
+UNIQUE_RATIO = 0.95
+MAX_PER_TABLE_PAIR = 3
+MAX_RELATIONSHIPS = 20
+
+_KEY_NAME = re.compile(r"(^|_)(id|key|code|uuid|sku)$|id$")
+
+
+@dataclass
+class ColumnSketch:
+    column: str
+    kind: str
+    rows: int
+    distinct: float
+    minhash: MinHash
+    members: BloomFilter
+
+    @property
+    def unique(self) -> bool:
+        return self.rows > 0 and self.distinct >= UNIQUE_RATIO * self.rows
+
+
+def sketch_table(df: pd.DataFrame) -> List[ColumnSketch]:
+    """
+    MinHash sample + HyperLogLog count + Bloom membership sketches of the columns that could be
+    join keys (ints, integral floats and strings; not dates, booleans or measures). Built once
+    per upload; discovery only ever compares sketches.
+    """
+    sketches: List[ColumnSketch] = []
+    for col in df.columns:
+        s = df[col]
+        if pd.api.types.is_datetime64_any_dtype(s) or pd.api.types.is_bool_dtype(s):
+            continue
+        hashes, kind = hash_values(s)
+        if kind not in ("int", "str") or not len(hashes):
+            continue
+
+        minhash = MinHash(hashes)
+        distinct = float(len(minhash.mins)) if minhash.exact else HyperLogLog(hashes).count()
+        if distinct < MIN_KEY_DISTINCT and not _KEY_NAME.search(str(col).lower()):
+            continue
+        sketches.append(ColumnSketch(str(col), kind, int(s.notna().sum()), distinct, minhash, BloomFilter(hashes)))
+    return sketches
+
+
+def discover_relationships(
+    sketches: Dict[str, List[ColumnSketch]],
+    min_containment: float = MIN_CONTAINMENT
+) -> List[Dict[str, Any]]:
+    """
+    Candidate join keys across tables: column A -> column B when most of A's distinct values
+    appear in B (containment estimated from the sketches) and B is unique-ish or the names agree
+    (accounts.id <- events.account_id). Returned best first, a few per table pair.
+
+    Only sketches are compared, so cost grows with the number of candidate columns, not rows.
+    """
+    by_pair: Dict[tuple, List[Dict[str, Any]]] = {}
+    tables = list(sketches)
+
+    for i, left_table in enumerate(tables):
+        for right_table in tables[i + 1:]:
+            for a in sketches[left_table]:
+                for b in sketches[right_table]:
+                    if a.kind != b.kind:
+                        continue
+                    # Both directions: the contained side is the foreign key
+                    for fk_table, fk, pk_table, pk in ((left_table, a, right_table, b), (right_table, b, left_table, a)):
+                        rel = _candidate(fk_table, fk, pk_table, pk, min_containment)
+                        if rel:
+                            by_pair.setdefault((left_table, right_table), []).append(rel)
+
+    relationships: List[Dict[str, Any]] = []
+    for rels in by_pair.values():
+        rels.sort(key=lambda r: r["score"], reverse=True)
+        seen = set()
+        for rel in rels:
+            # One direction per column pair
+            cols = frozenset([(rel["left_table"], rel["left_column"]), (rel["right_table"], rel["right_column"])])
+            if cols in seen:
+                continue
+            seen.add(cols)
+            relationships.append(rel)
+            if len(seen) >= MAX_PER_TABLE_PAIR:
+                break
+
+    relationships.sort(key=lambda r: r["score"], reverse=True)
+    return relationships[:MAX_RELATIONSHIPS]
+
+
+def _candidate(fk_table, fk: ColumnSketch, pk_table, pk: ColumnSketch, min_containment: float):
+    names_match = _names_match(fk.column, pk_table, pk.column)
+    if not (pk.unique or names_match):
+        return None
+    if not names_match and fk.distinct < MIN_UNNAMED_COVERAGE * pk.distinct:
+        return None
+    # Cheap cardinality bound before comparing sketches: A can't be mostly inside a much smaller B
+    if fk.distinct * min_containment > pk.distinct * 1.1:
+        return None
+
+    share = containment(fk.minhash, pk.members)
+    if share < min_containment:
+        return None
+
+    return {
+        "left_table": fk_table,
+        "left_column": fk.column,
+        "right_table": pk_table,
+        "right_column": pk.column,
+        "containment": round(share, 3),
+        "cardinality": f"{'one' if fk.unique else 'many'}-to-{'one' if pk.unique else 'many'}",
+        "left_distinct": int(round(fk.distinct)),
+        "right_distinct": int(round(pk.distinct)),
+        "score": round(share + (0.2 if names_match else 0.0) + (0.1 if pk.unique else 0.0), 3),
+    }
+
+
+def _names_match(fk_col: str, pk_table: str, pk_col: str) -> bool:
+    fk_col, pk_col = fk_col.lower(), pk_col.lower()
+    if fk_col == pk_col:
+        return True
+    entity = pk_table.lower()
+    entity = entity[:-1] if entity.endswith("s") and not entity.endswith("ss") else entity
+    return fk_col in {f"{entity}_{pk_col}", f"{entity}{pk_col}"}
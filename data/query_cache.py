@@ -0,0 +1,153 @@
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Iterable, List
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+_TOKEN = re.compile(
+    r"'(?:[^']|'')*'"           # string literal (kept verbatim)
+    r'|"(?:[^"]|"")*"'          # quoted identifier
+    r"|\d+(?:\.\d+)?"           # number
+    r"|[A-Za-z_][\w$]*"         # identifier / keyword
+    r"|<>|!=|<=|>=|\|\||::"     # multi-char operators
+    r"|\S"                      # any other single char
+)
+
+
+def canonicalize_sql(sql: str) -> str:
+    """
+    Normalize cosmetic differences so equivalent queries share a cache key: comments dropped,
+    whitespace collapsed, identifiers/keywords lower-cased (sqlite is case-insensitive for them,
+    quoted ones included), literal IN-lists sorted, trailing semicolons removed.
+    String literals are kept exactly.
+    """
+    sql = re.sub(r"--[^\n]*", " ", sql)
+    sql = re.sub(r"/\*.*?\*/", " ", sql, flags=re.S)
+
+    tokens: List[str] = []
+    for tok in _TOKEN.findall(sql):
+        if tok.startswith("'"):
+            tokens.append(tok)
+        elif tok.startswith('"'):
+            # Quotes stay: "revenue total" is one identifier, revenue total is a column + alias
+            tokens.append(tok.lower())
+        else:
+            tokens.append(tok.lower())
+
+    tokens = _sort_in_lists(tokens)
+    while tokens and tokens[-1] == ";":
+        tokens.pop()
+    return " ".join(tokens)
+
+
+def cache_key(sql: str, dataset_versions: Iterable[str]) -> str:
+    payload = canonicalize_sql(sql) + "\x00" + "\x00".join(sorted(dataset_versions))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class QueryResultCache:
+    """
+    LRU cache of query results (DataFrames) bounded by total in-memory bytes.
+
+    Entries remember which dataset versions they were computed from so replacing a dataset
+    can drop them (invalidate_dataset). Thread-safe; shared across sessions.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry["result"]
+
+    def put(self, key: str, result, dataset_versions: Iterable[str]) -> bool:
+        size = int(result.memory_usage(deep=True).sum())
+        if size > self.max_bytes:
+            return False
+
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)["bytes"]
+            self._entries[key] = {"result": result, "bytes": size, "versions": set(dataset_versions)}
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, old = self._entries.popitem(last=False)
+                self._bytes -= old["bytes"]
+                self.evictions += 1
+        return True
+
+    def invalidate_dataset(self, version: str) -> int:
+        """Drop every result computed from this dataset version; returns how many were dropped."""
+        with self._lock:
+            stale = [k for k, e in self._entries.items() if version in e["versions"]]
+            for k in stale:
+                self._bytes -= self._entries.pop(k)["bytes"]
+            self.invalidations += len(stale)
+            return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+def _sort_in_lists(tokens: List[str]) -> List[str]:
+    """Sort `IN (lit, lit, ...)` lists that contain only literals."""
+    out: List[str] = []
+    i = 0
+    while i < len(tokens):
+        out.append(tokens[i])
+        if tokens[i] == "in" and i + 1 < len(tokens) and tokens[i + 1] == "(":
+            end = tokens.index(")", i + 1) if ")" in tokens[i + 1:] else -1
+            inner = tokens[i + 2:end] if end > 0 else []
+            values = inner[0::2]
+            commas = inner[1::2]
+            if values and all(_is_literal(v) for v in values) and all(c == "," for c in commas) and len(values) == len(commas) + 1:
+                literals = sorted(values, key=_literal_key)
+                out.append("(")
+                for j, v in enumerate(literals):
+                    if j:
+                        out.append(",")
+                    out.append(v)
+                out.append(")")
+                i = end + 1
+                continue
+        i += 1
+    return out
+
+
+def _is_literal(tok: str) -> bool:
+    return tok.startswith("'") or bool(re.fullmatch(r"\d+(?:\.\d+)?", tok))
+
+
+def _literal_key(tok: str):
+    return (0, float(tok), "") if not tok.startswith("'") else (1, 0.0, tok)
@@ -0,0 +1,169 @@
+from itertools import combinations
+from typing import Optional, Dict, List, Tuple
+
+import pandas as pd
+
+MAX_DIM_CARDINALITY = 50
+MAX_DIMS = 4
+PRECOMPUTE_DIM_COMBOS = 2
+GRAINS = ("day", "week", "month")
+
+_DAY = "__day"
+
+
+class RollupCube:
+    """
+    Group-by cube over one time column (bucketed by day/week/month), low-cardinality
+    categorical dimensions and numeric measures.
+
+    The base cuboid holds sum/count/min/max per (day, all dims); every coarser cuboid is rolled
+    up from it, so queries never touch the raw frame. Cuboids with up to PRECOMPUTE_DIM_COMBOS
+    dimensions are built eagerly, the rest on first use.
+    """
+
+    def __init__(self, base: pd.DataFrame, time_col: Optional[str], dims: List[str], measures: List[str], rows: int):
+        self.base = base
+        self.time_col = time_col
+        self.dims = dims
+        self.measures = measures
+        self.rows = rows
+        self.dim_values: Dict[str, List[str]] = {
+            d: [str(v) for v in base[d].dropna().unique()] for d in dims
+        }
+        self.time_span_days = (
+            int((base[_DAY].max() - base[_DAY].min()).days) if time_col and len(base) else 0
+        )
+        self._cuboids: Dict[Tuple[Optional[str], Tuple[str, ...]], pd.DataFrame] = {}
+
+        grains = (None,) + (GRAINS if time_col else ())
+        for grain in grains:
+            for k in range(PRECOMPUTE_DIM_COMBOS + 1):
+                for combo in combinations(dims, k):
+                    self.cuboid(grain, combo)
+
+    def cuboid(self, grain: Optional[str], dims: Tuple[str, ...]) -> pd.DataFrame:
+        key = (grain, tuple(d for d in self.dims if d in dims))
+        if key not in self._cuboids:
+            self._cuboids[key] = self._rollup(*key)
+        return self._cuboids[key]
+
+    def query(
+        self,
+        measure: Optional[str],
+        agg: str = "sum",
+        dims: Tuple[str, ...] = (),
+        grain: Optional[str] = None,
+        filters: Optional[Dict[str, str]] = None
+    ) -> pd.DataFrame:
+        """
+        Aggregate measure (None = row count) by dims and optional time grain,
+        after equality filters on dimension values.
+        """
+        filters = filters or {}
+        keys = ([self.time_col] if grain else []) + list(dims)
+
+        cub = self.cuboid(grain, tuple(dims) + tuple(filters))
+        if filters:
+            for dim, value in filters.items():
+                cub = cub[cub[dim].astype(str) == value]
+            # The filter dims were only needed to slice; roll them back out
+            cub = self._reaggregate(cub, keys)
+
+        if measure is None:
+            label, values = "rows", cub["__rows"]
+        elif agg == "mean":
+            label = f"avg_{measure}"
+            values = cub[f"{measure}__sum"] / cub[f"{measure}__count"].where(cub[f"{measure}__count"] > 0)
+        else:
+            label = measure if agg == "sum" else f"{agg}_{measure}"
+            values = cub[f"{measure}__{agg}"]
+
+        out = cub[keys].copy()
+        out[label] = values
+        if keys:
+            out = out.sort_values(keys)
+        return out.reset_index(drop=True)
+
+    def _rollup(self, grain: Optional[str], dims: Tuple[str, ...]) -> pd.DataFrame:
+        frame = self.base
+        keys = list(dims)
+        if grain:
+            frame = frame.assign(**{self.time_col: bucket_dates(frame[_DAY], grain)})
+            keys = [self.time_col] + keys
+        return self._reaggregate(frame, keys)
+
+    def _reaggregate(self, frame: pd.DataFrame, keys: List[str]) -> pd.DataFrame:
+        spec = {"__rows": "sum"}
+        for m in self.measures:
+            spec.update({f"{m}__sum": "sum", f"{m}__count": "sum", f"{m}__min": "min", f"{m}__max": "max"})
+        if not keys:
+            total = frame[list(spec)].agg(spec).to_frame().T.infer_objects()
+            return total.astype({"__rows": "int64"})
+        return frame.groupby(keys, observed=True, dropna=False, sort=False).agg(spec).reset_index()
+
+
+def build_cube(df: pd.DataFrame) -> Optional[RollupCube]:
+    """Detect dimensions/measures and build the cube; None when the frame has nothing to aggregate."""
+    time_col, days = _detect_time(df)
+    measures = [
+        c for c in df.columns
+        if pd.api.types.is_numeric_dtype(df[c]) and not pd.api.types.is_bool_dtype(df[c])
+    ]
+    if not measures:
+        return None
+
+    dims = _detect_dims(df, exclude={time_col, *measures})
+
+    frame = df[dims + measures].copy()
+    # Measures may be downcast on ingest (int16/float32); aggregate at full width so sums can't overflow
+    for m in measures:
+        frame[m] = frame[m].astype("int64" if pd.api.types.is_integer_dtype(frame[m]) else "float64")
+    frame[_DAY] = days if time_col else pd.Timestamp(0)
+    frame["__rows"] = 1
+
+    spec = {"__rows": ("__rows", "sum")}
+    for m in measures:
+        spec.update({f"{m}__sum": (m, "sum"), f"{m}__count": (m, "count"), f"{m}__min": (m, "min"), f"{m}__max": (m, "max")})
+
+    base = frame.groupby([_DAY] + dims, observed=True, dropna=False, sort=False).agg(**spec).reset_index()
+    return RollupCube(base, time_col, dims, measures, rows=len(df))
+
+
+def _detect_time(df: pd.DataFrame) -> Tuple[Optional[str], Optional[pd.Series]]:
+    for col in df.columns:
+        s = df[col]
+        if pd.api.types.is_datetime64_any_dtype(s):
+            return col, (s.dt.tz_convert(None) if s.dt.tz is not None else s).dt.floor("D")
+        if pd.api.types.is_object_dtype(s) or pd.api.types.is_string_dtype(s):
+            sample = s.dropna().astype(str).head(50)
+            if sample.empty or not sample.str.contains(r"\d").all():
+                continue
+            parsed = pd.to_datetime(sample, errors="coerce")
+            if parsed.notna().mean() >= 0.9:
+                return col, pd.to_datetime(s, errors="coerce").dt.floor("D")
+    return None, None
+
+
+def _detect_dims(df: pd.DataFrame, exclude) -> List[str]:
+    candidates = []
+    for col in df.columns:
+        if col in exclude:
+            continue
+        n = df[col].nunique(dropna=True)
+        if 0 < n <= MAX_DIM_CARDINALITY and n < len(df):
+            candidates.append((n, col))
+    return [col for _, col in sorted(candidates)[:MAX_DIMS]]
+
+
+def grain_for_span(days: int) -> str:
+    """Default bucket for a time axis spanning this many days: daily up to a quarter, weekly up to two years."""
+    return "day" if days <= 92 else ("week" if days <= 730 else "month")
+
+
+def bucket_dates(days: pd.Series, grain: str) -> pd.Series:
+    """Start of the day/week (Monday)/month bucket for day-floored timestamps."""
+    if grain == "day":
+        return days
+    if grain == "week":
+        return days - pd.to_timedelta(days.dt.dayofweek, unit="D")
+    return days.dt.to_period("M").dt.start_time
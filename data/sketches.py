@@ -0,0 +1,127 @@
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+MINHASH_K = 256
+HLL_P = 12
+BLOOM_FP_RATE = 0.01
+
+_U64 = np.uint64
+_INT_STRING = r"-?\d{1,18}"
+
+
+def hash_values(values: pd.Series) -> Tuple[np.ndarray, str]:
+    """
+    64-bit hashes of a column's distinct non-null values, plus the key kind ("int", "str" or "float").
+
+    Values are normalized so the same key hashes the same across tables: integral floats and
+    digit-only strings hash as integers, other strings are stripped and lower-cased.
+    """
+    s = values.dropna()
+    uniq = pd.Series(s.unique())
+    if uniq.empty:
+        return np.empty(0, dtype=_U64), "str"
+
+    if pd.api.types.is_bool_dtype(s):
+        return pd.util.hash_array(uniq.to_numpy(dtype="int64")), "bool"
+    if pd.api.types.is_integer_dtype(s):
+        return pd.util.hash_array(uniq.to_numpy(dtype="int64")), "int"
+    if pd.api.types.is_float_dtype(s):
+        if (uniq == np.floor(uniq)).all():
+            return pd.util.hash_array(uniq.to_numpy(dtype="int64")), "int"
+        return pd.util.hash_array(uniq.to_numpy(dtype="float64")), "float"
+
+    text = uniq.astype(str).str.strip().str.lower()
+    if text.str.fullmatch(_INT_STRING).all():
+        ints = pd.Series(text.astype("int64").unique())
+        return pd.util.hash_array(ints.to_numpy(dtype="int64")), "int"
+    return pd.util.hash_array(text.unique().astype(object), categorize=False), "str"
+
+
+class MinHash:
+    """
+    Bottom-k MinHash: the k smallest distinct-value hashes. One hash per value and an O(n)
+    partition; the kept hashes are a uniform random sample of the column's distinct values.
+    """
+
+    def __init__(self, hashes: np.ndarray, k: int = MINHASH_K):
+        self.k = k
+        self.exact = len(hashes) <= k
+        if self.exact:
+            self.mins = np.unique(hashes)
+        else:
+            self.mins = np.sort(np.partition(hashes, k - 1)[:k])
+
+
+class BloomFilter:
+    """
+    Membership sketch over a column's distinct-value hashes (~9.6 bits per value at 1% false
+    positives). Lets a small column's MinHash sample be checked against a large column without
+    the large column's values.
+    """
+
+    def __init__(self, hashes: np.ndarray, fp_rate: float = BLOOM_FP_RATE):
+        n = max(1, len(hashes))
+        self.fp_rate = fp_rate
+        self.m = max(64, int(np.ceil(-n * np.log(fp_rate) / np.log(2) ** 2)))
+        self.k = max(1, int(round(self.m / n * np.log(2))))
+        bits = np.zeros(self.m, dtype=bool)
+        for positions in self._positions(hashes):
+            bits[positions] = True
+        self.bits = np.packbits(bits)
+
+    def _positions(self, hashes: np.ndarray):
+        # Double hashing: position_i = h1 + i * h2 (mod m)
+        h = hashes.astype(_U64, copy=False)
+        h1 = h & _U64(0xFFFFFFFF)
+        # Remixed so the small hashes a MinHash sample holds don't get near-identical probe steps
+        h2 = ((h * _U64(0x9E3779B97F4A7C15)) >> _U64(32)) | _U64(1)
+        for i in range(self.k):
+            yield ((h1 + _U64(i) * h2) % _U64(self.m)).astype(np.int64)
+
+    def contains(self, hashes: np.ndarray) -> np.ndarray:
+        found = np.ones(len(hashes), dtype=bool)
+        for positions in self._positions(hashes):
+            found &= (self.bits[positions >> 3] >> (7 - (positions & 7)).astype(np.uint8)) & 1 == 1
+        return found
+
+
+class HyperLogLog:
+    """HyperLogLog distinct-count sketch with 2**p registers (p=12 -> ~1.6% standard error)."""
+
+    def __init__(self, hashes: np.ndarray, p: int = HLL_P):
+        self.p = p
+        self.registers = np.zeros(1 << p, dtype=np.uint8)
+        if not len(hashes):
+            return
+
+        h = hashes.astype(_U64, copy=False)
+        idx = (h >> _U64(64 - p)).astype(np.int64)
+        rest = (h << _U64(p)) | _U64(1 << (p - 1))
+        # rank = leading zeros of the remaining bits + 1
+        rank = 64 - np.floor(np.log2(rest.astype(np.float64))).astype(np.int64)
+        np.maximum.at(self.registers, idx, rank.astype(np.uint8))
+
+    def count(self) -> float:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.power(2.0, -self.registers.astype(np.float64)))
+        zeros = int((self.registers == 0).sum())
+        if estimate <= 2.5 * m and zeros:
+            # Small-range correction (linear counting)
+            estimate = m * np.log(m / zeros)
+        return float(estimate)
+
+
+def containment(a: MinHash, b: BloomFilter) -> float:
+    """
+    Estimated share of A's distinct values that also appear in B: |A ∩ B| / |A|.
+
+    A's bottom-k hashes are a uniform sample of A, so the share of them found in B's filter
+    (corrected for false positives) estimates containment however much larger B is.
+    """
+    if not len(a.mins):
+        return 0.0
+    hit = float(b.contains(a.mins).mean())
+    return max(0.0, min(1.0, (hit - b.fp_rate) / (1 - b.fp_rate)))
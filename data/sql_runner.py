@@ -0,0 +1,162 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional, Dict, Any, Tuple
+
+import pandas as pd
+
+from data.query_cache import QueryResultCache, cache_key
+from validators.sql_cost import referenced_tables, unqualify_tables
+from validators.sql_validator import strip_sql_comments_and_literals
+
+MAX_RESULT_ROWS = 10_000
+MAX_ENGINES = 4
+DEFAULT_TABLE = "dataset"
+
+# Generated SQL may only read: anything else (DELETE, ATTACH, PRAGMA, ...) is denied by the authorizer
+_READ_ACTIONS = {
+    sqlite3.SQLITE_SELECT, sqlite3.SQLITE_READ, sqlite3.SQLITE_FUNCTION,
+    getattr(sqlite3, "SQLITE_RECURSIVE", 33),
+}
+
+# Process-wide: shared by every session
+RESULT_CACHE = QueryResultCache(max_bytes=int(os.getenv("QUERY_CACHE_MB", "256")) * 1024 * 1024)
+
+
+class SqliteEngine:
+    """In-memory sqlite copy of a set of dataset versions; loaded once, queried many times."""
+
+    def __init__(self, tables: Dict[str, pd.DataFrame]):
+        self.conn = sqlite3.connect(":memory:", check_same_thread=False)
+        self.conn.create_function("date_trunc", 2, _date_trunc)
+        self.lock = threading.Lock()
+        for name, df in tables.items():
+            _to_sqlite_frame(df).to_sql(name, self.conn, index=False)
+
+    def query(self, sql: str, max_rows: int = MAX_RESULT_ROWS) -> pd.DataFrame:
+        check_read_only(sql)
+        with self.lock:
+            self.conn.set_authorizer(None)
+            # Tables the model named differently (e.g. "events" for the upload) are views over the default table
+            existing = {r[0].lower() for r in self.conn.execute("SELECT name FROM sqlite_master")}
+            refs = referenced_tables(strip_sql_comments_and_literals(sql))
+            for name, _ in refs:
+                short = name.split(".")[-1]
+                if short not in existing and DEFAULT_TABLE in existing:
+                    self.conn.execute(f'CREATE TEMP VIEW IF NOT EXISTS "{short}" AS SELECT * FROM "{DEFAULT_TABLE}"')
+                    existing.add(short)
+
+            # The engine is shared across sessions and its results are cached: it must never be modified
+            self.conn.set_authorizer(_read_only_authorizer)
+            try:
+                cur = self.conn.execute(unqualify_tables(sql, refs))
+                columns = [d[0] for d in cur.description or []]
+                return pd.DataFrame(cur.fetchmany(max_rows), columns=columns)
+            finally:
+                self.conn.set_authorizer(None)
+
+
+_engines: "OrderedDict[Tuple[Tuple[str, str], ...], SqliteEngine]" = OrderedDict()
+_engines_lock = threading.Lock()
+
+
+def get_engine(tables: Dict[str, pd.DataFrame], versions: Dict[str, str]) -> SqliteEngine:
+    key = tuple(sorted(versions.items()))
+    with _engines_lock:
+        engine = _engines.get(key)
+        if engine is not None:
+            _engines.move_to_end(key)
+            return engine
+
+    engine = SqliteEngine(tables)
+    with _engines_lock:
+        _engines[key] = engine
+        while len(_engines) > MAX_ENGINES:
+            _engines.popitem(last=False)
+    return engine
+
+
+def run_query(
+    sql: str,
+    tables: Dict[str, pd.DataFrame],
+    versions: Dict[str, str],
+    cache: Optional[QueryResultCache] = RESULT_CACHE,
+    max_rows: int = MAX_RESULT_ROWS
+) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """
+    Run SQL locally against the given frames, serving repeats from the result cache.
+    Keyed by the canonicalized SQL plus the content versions of the datasets.
+    Cached frames are shared between callers: treat the result as read-only.
+    """
+    start = time.perf_counter()
+    check_read_only(sql)
+    key = cache_key(sql, versions.values())
+
+    if cache is not None:
+        hit = cache.get(key)
+        if hit is not None:
+            return hit, {"cache_hit": True, "rows": len(hit), "elapsed_ms": round((time.perf_counter() - start) * 1000, 2)}
+
+    result = get_engine(tables, versions).query(sql, max_rows=max_rows)
+    if cache is not None:
+        cache.put(key, result, versions.values())
+    return result, {"cache_hit": False, "rows": len(result), "elapsed_ms": round((time.perf_counter() - start) * 1000, 2)}
+
+
+def check_read_only(sql: str):
+    """Raise ValueError unless sql is a single SELECT / WITH statement."""
+    body = strip_sql_comments_and_literals(sql).strip().rstrip(";").strip()
+    if ";" in body:
+        raise ValueError("Only a single SQL statement can be run locally.")
+    if not re.match(r"(select|with)\b", body, flags=re.I):
+        raise ValueError("Only SELECT queries can be run locally.")
+
+
+def _read_only_authorizer(action, arg1, arg2, db_name, trigger):
+    return sqlite3.SQLITE_OK if action in _READ_ACTIONS else sqlite3.SQLITE_DENY
+
+
+def invalidate_dataset(version: str) -> int:
+    """Forget cached results and loaded engines built from this dataset version."""
+    with _engines_lock:
+        for key in [k for k in _engines if version in dict(k).values()]:
+            del _engines[key]
+    return RESULT_CACHE.invalidate_dataset(version)
+
+
+def _to_sqlite_frame(df: pd.DataFrame) -> pd.DataFrame:
+    out = df.copy()
+    for col in out.columns:
+        s = out[col]
+        if isinstance(s.dtype, pd.CategoricalDtype):
+            out[col] = s.astype(object).where(s.notna(), None)
+        elif pd.api.types.is_datetime64_any_dtype(s):
+            # ISO text sorts and compares correctly in sqlite; date-only columns keep the
+            # '2024-01-01' form the profile shows the model, so equality/BETWEEN filters match
+            date_only = bool((s.dropna() == s.dropna().dt.normalize()).all())
+            fmt = "%Y-%m-%d" if date_only else "%Y-%m-%d %H:%M:%S"
+            out[col] = s.dt.strftime(fmt).where(s.notna(), None)
+    return out
+
+
+def _date_trunc(unit, value):
+    if value is None:
+        return None
+    try:
+        ts = datetime.fromisoformat(str(value)[:19])
+    except ValueError:
+        return None
+    unit = str(unit).lower()
+    if unit == "year":
+        ts = ts.replace(month=1, day=1)
+    elif unit == "quarter":
+        ts = ts.replace(month=3 * ((ts.month - 1) // 3) + 1, day=1)
+    elif unit == "month":
+        ts = ts.replace(day=1)
+    elif unit == "week":
+        ts = datetime.fromordinal(ts.toordinal() - ts.weekday())
+    return ts.strftime("%Y-%m-%d")
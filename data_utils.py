@@ -1,6 +1,7 @@
-import pandas as pd
-
 def load_csv(file):
+    # pandas is imported lazily so app startup doesn't pay for it until a file is uploaded
+    import pandas as pd
+
     # Try different encodings if default fails
     try:
         return pd.read_csv(file)
@@ -32,4 +33,122 @@ def summarize_df(df, max_cols=50):
     if len(df.columns) > max_cols:
         summary["warning"] = f"Schema truncated. Only first {max_cols} columns shown."
         
-    return summary
\ No newline at end of file
+    return summary
+
+# Tried in order on a sample; the first format that parses every sampled value is used for the whole column
+DATE_FORMATS = [
+    "%Y-%m-%d", "%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S", "%Y/%m/%d",
+    "%m/%d/%Y", "%d/%m/%Y", "%m/%d/%y", "%d/%m/%y", "%m/%d/%Y %H:%M", "%m/%d/%Y %H:%M:%S",
+    "%d-%m-%Y", "%d.%m.%Y", "ISO8601",
+]
+
+# Downcast ints only to a width that still fits max(|x|) * INT_HEADROOM, so arithmetic in generated code doesn't overflow
+INT_HEADROOM = 100
+
+def optimize_dtypes(df, max_category_ratio=0.5, arrow_strings=False, sample_size=1000):
+    """
+    Shrink a freshly loaded frame in place of pandas defaults:
+    - date-like strings -> datetime64 (format inferred on a sample, then parsed vectorized); only
+      when every non-null value parses, otherwise the column stays text
+    - low-cardinality strings -> category
+    - other strings -> string[pyarrow] when arrow_strings=True and pyarrow is installed
+    - ints -> smallest signed width with INT_HEADROOM; floats -> float32 only when lossless
+
+    Returns (df, report) with memory before/after (bytes) and the per-column conversions.
+    """
+    import numpy as np
+    import pandas as pd
+
+    before = int(df.memory_usage(deep=True).sum())
+    out = df.copy()
+    changes = {}
+
+    if arrow_strings:
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            arrow_strings = False
+
+    for col in out.columns:
+        s = out[col]
+        old = str(s.dtype)
+
+        if pd.api.types.is_object_dtype(s) or pd.api.types.is_string_dtype(s):
+            non_null = s.dropna()
+            if non_null.empty:
+                continue
+            for fmt in _date_formats(non_null.astype(str).head(sample_size)):
+                parsed = pd.to_datetime(s, format=fmt, errors="coerce")
+                # The sample can miss rows in another format: a value that would become NaT means try the next one
+                if parsed.notna().sum() == len(non_null):
+                    out[col] = parsed
+                    break
+            if not pd.api.types.is_datetime64_any_dtype(out[col]):
+                if non_null.nunique() <= max_category_ratio * len(s):
+                    out[col] = s.astype("category")
+                elif arrow_strings:
+                    out[col] = s.astype("string[pyarrow]")
+
+        elif pd.api.types.is_integer_dtype(s) and not pd.api.types.is_bool_dtype(s) and len(s):
+            if isinstance(s.dtype, np.dtype):  # numpy ints only; nullable Int64 etc. are left alone
+                bound = max(abs(int(s.min())), abs(int(s.max()))) * INT_HEADROOM
+                for dtype in (np.int8, np.int16, np.int32):
+                    if bound <= np.iinfo(dtype).max:
+                        out[col] = s.astype(dtype)
+                        break
+
+        elif pd.api.types.is_float_dtype(s) and s.dtype == np.float64:
+            as32 = s.astype(np.float32)
+            if ((as32.astype(np.float64) == s) | s.isna()).all():
+                out[col] = as32
+
+        if str(out[col].dtype) != old:
+            changes[col] = f"{old} -> {out[col].dtype}"
+
+    after = int(out.memory_usage(deep=True).sum())
+    return out, {"memory_before": before, "memory_after": after, "columns": changes}
+
+def _date_formats(sample):
+    """DATE_FORMATS entries that parse every value in the sample, in preference order."""
+    import pandas as pd
+
+    if not sample.str.contains(r"\d").all() or not sample.str.contains(r"[-/.:T]").all():
+        return
+    for fmt in DATE_FORMATS:
+        try:
+            pd.to_datetime(sample, format=fmt, errors="raise")
+        except (ValueError, TypeError):
+            continue
+        yield fmt
+
+def dataset_fingerprint(df):
+    """Content hash of a frame (values, index, column names and dtypes); changes whenever the data does."""
+    import hashlib
+    import pandas as pd
+
+    h = hashlib.sha256()
+    h.update(repr([(str(c), str(t)) for c, t in df.dtypes.items()]).encode("utf-8"))
+    h.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return h.hexdigest()[:16]
+
+def markdown_table(df, max_rows=200):
+    """Render a small frame as a markdown table (dates as YYYY-MM-DD, numbers with separators)."""
+    import numbers
+
+    def fmt(value):
+        if hasattr(value, "strftime"):
+            return value.strftime("%Y-%m-%d")
+        if isinstance(value, numbers.Integral):
+            return f"{value:,}"
+        if isinstance(value, numbers.Real):
+            return f"{value:,.2f}"
+        return str(value)
+
+    shown = df.head(max_rows)
+    header = "| " + " | ".join(str(c) for c in shown.columns) + " |"
+    sep = "| " + " | ".join("---" for _ in shown.columns) + " |"
+    body = "\n".join("| " + " | ".join(fmt(v) for v in row) + " |" for row in shown.itertuples(index=False))
+    out = f"{header}\n{sep}\n{body}"
+    if len(df) > max_rows:
+        out += f"\n\n_Showing the first {max_rows} of {len(df)} rows._"
+    return out
@@ -1,12 +1,28 @@
-from openai import OpenAI
 import json
+import threading
 
 class LLMClient:
     def __init__(self, config):
+        # Deferred so importing the app does not pay for the openai/httpx import chain
+        from openai import OpenAI
+
         self.client = OpenAI(api_key=config.api_key)
         self.model = config.model
         self.temperature = config.temperature
 
+    def prewarm(self):
+        """Open the upstream connection pool in the background (DNS + TLS) so the first question doesn't pay for it."""
+        def _warm():
+            try:
+                self.client.models.list()
+            except Exception:
+                # Auth/network errors are fine here: the handshake is what we wanted
+                pass
+
+        thread = threading.Thread(target=_warm, name="llm-prewarm", daemon=True)
+        thread.start()
+        return thread
+
     def json(self, system, user, schema_hint):
         response = self.client.chat.completions.create(
             model=self.model,
@@ -30,3 +46,11 @@ class LLMClient:
             ]
         )
         return response.choices[0].message.content
+
+
+def build_llm_client(config):
+    """Return the client for config.provider ("openai" or the offline "stub")."""
+    if config.provider == "stub":
+        from llm.stub import StubLLMClient
+        return StubLLMClient(config)
+    return LLMClient(config)
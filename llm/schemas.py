@@ -13,7 +13,7 @@ PLANNER_SCHEMA = """
   "tasks": [
     {
       "id": "t1",
-      "intent": "BUSINESS_STRATEGY|PRODUCT_ANALYTICS|SQL_INVESTIGATION|PANDAS_TRANSFORM|UNSUPPORTED",
+      "intent": "BUSINESS_STRATEGY|PRODUCT_ANALYTICS|SQL_INVESTIGATION|PANDAS_TRANSFORM|VISUALIZATION|UNSUPPORTED",
       "question": "string",
       "supported": true,
       "requires": ["string"]
@@ -22,3 +22,15 @@ PLANNER_SCHEMA = """
   "confidence": 0.0
 }
 """
+
+VIZ_SCHEMA = """
+{
+  "chart": "line|bar|scatter|pie",
+  "x": "column name",
+  "y": "numeric column name or null (count rows)",
+  "color": "column name or null",
+  "agg": "sum|mean|count|min|max",
+  "time_grain": "day|week|month|null",
+  "title": "string"
+}
+"""
@@ -8,6 +8,7 @@ Allowed intents:
 - PRODUCT_ANALYTICS
 - SQL_INVESTIGATION
 - PANDAS_TRANSFORM
+- VISUALIZATION (charts/plots of the uploaded dataset)
 - UNSUPPORTED
 
 If mixed intent, create multiple tasks.
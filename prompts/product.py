@@ -1,3 +1,5 @@
+from prompts.sql import format_relationships
+
 def product_missing_context_questions(question: str) -> list[str]:
     qs = []
     if "adoption" in question.lower():
@@ -19,7 +21,15 @@ Question:
 {question}
 """
 
-def build_pandas_prompt(question: str, df_summary: str | None = None) -> str:
+def _pandas_joins(relationships: list[dict] | None) -> str:
+    if relationships is None:
+        return ""
+    return f"""
+Each table in df_summary is loaded as a DataFrame with the table's name. Merge keys (detected from the data):
+{format_relationships(relationships)}
+"""
+
+def build_pandas_prompt(question: str, df_summary: str | None = None, relationships: list[dict] | None = None) -> str:
     return f"""Write pandas code to solve the task.
 
 Rules:
@@ -30,9 +40,35 @@ Rules:
 
 df_summary:
 {df_summary or "None"}
+{_pandas_joins(relationships)}
+Task:
+{question}
+
+Return ONLY python code (no explanation).
+"""
 
+def build_pandas_fix_prompt(
+    question: str, code: str, findings: list[dict], df_summary: str | None = None, relationships: list[dict] | None = None
+) -> str:
+    issues = "\n".join(f"- line {f['line']}: {f['message']}" for f in findings)
+    return f"""Rewrite this pandas code so it stays fast on a large dataframe.
+
+Fix these issues (keep the result identical):
+{issues}
+
+Rules:
+- No Python loops over rows, iterrows/itertuples, or apply(axis=1)
+- Use vectorized column ops, np.where/np.select, groupby/transform, merge
+- Build lists of parts and call pd.concat once
+
+df_summary:
+{df_summary or "None"}
+{_pandas_joins(relationships)}
 Task:
 {question}
 
+Code:
+{code}
+
 Return ONLY python code (no explanation).
 """
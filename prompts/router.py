@@ -1,6 +1,6 @@
 ROUTER_SYSTEM = """Classify which intents are present in the user's request.
 Return JSON only.
-Allowed labels: BUSINESS_STRATEGY, PRODUCT_ANALYTICS, SQL_INVESTIGATION, PANDAS_TRANSFORM.
+Allowed labels: BUSINESS_STRATEGY, PRODUCT_ANALYTICS, SQL_INVESTIGATION, PANDAS_TRANSFORM, VISUALIZATION.
 """
 
 def router_user_prompt(user_input: str, df_summary: str | None = None) -> str:
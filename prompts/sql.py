@@ -12,7 +12,22 @@ def sql_missing_context_questions(question: str, df_summary: str | None = None)
         qs.append("What date column should I use for time filtering (event_date, created_at, etc.)?")
     return qs
 
-def build_sql_prompt(question: str, df_summary: str | None = None) -> str:
+def format_relationships(relationships: list[dict] | None) -> str:
+    if not relationships:
+        return "None detected"
+    return "\n".join(
+        f"- {r['left_table']}.{r['left_column']} -> {r['right_table']}.{r['right_column']} "
+        f"({r['cardinality']}, {r['containment']:.0%} of values match)"
+        for r in relationships
+    )
+
+def build_sql_prompt(question: str, df_summary: str | None = None, relationships: list[dict] | None = None) -> str:
+    joins = ""
+    if relationships is not None:
+        joins = f"""
+Join keys (detected from the data; prefer these over guessing):
+{format_relationships(relationships)}
+"""
     return f"""Write a single SQL query using CTEs where helpful.
 
 Requirements:
@@ -21,10 +36,11 @@ Requirements:
 - Make it readable
 - Do NOT invent tables/columns; only use what is in the schema summary if provided.
 - If the schema summary is missing, write a best-guess SQL skeleton and include TODO comments where schema is needed.
+- When several tables are listed, use their names exactly as given.
 
 Schema summary:
 {df_summary or "None provided"}
-
+{joins}
 Question:
 {question}
 """
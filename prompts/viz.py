@@ -8,17 +8,17 @@ Task: {question}
 
 Visual Intelligence Rules:
 1. Time Series Logic: If the user asks for a 'trend' and there are multiple rows per date (e.g., segmented by category), you MUST either:
-   - Use the 'color' parameter to split lines by category.
-   - Or AGGREGATE the data (e.g., df.groupby('Date').sum()) so the line doesn't 'sawtooth'.
+   - Use the 'color' field to split lines by category.
+   - Or AGGREGATE the data (agg + time_grain) so the line doesn't 'sawtooth'.
 2. Chart Selection:
    - Trends/Time: Line Chart.
    - Comparisons: Bar Chart.
    - Correlations: Scatter Plot.
-   - Proportions: Pie or Donut Chart.
-3. Cleanliness: Always include a title, clear axis labels, and use a professional template (e.g., template='plotly_white').
+   - Proportions: Pie Chart.
+3. Cleanliness: Always include a clear, descriptive title.
 
 Requirements:
-- Assume the dataframe is `df`.
-- Use Plotly Express (`px`).
-- Output ONLY the Python code block.
-""".strip()
\ No newline at end of file
+- Do NOT write code. The chart is rendered server-side from your spec (aggregation and downsampling are applied for you).
+- Use only column names from the schema, spelled exactly.
+- Return ONLY the JSON chart spec.
+""".strip()
@@ -0,0 +1,80 @@
+import json
+import time
+from typing import Optional, Dict, Any, Iterator, List
+from urllib.error import HTTPError
+from urllib.parse import quote
+from urllib.request import Request, urlopen
+
+DEFAULT_TIMEOUT_S = 120
+BUSY_RETRIES = 3
+MAX_RETRY_WAIT_S = 5.0
+
+
+class ServiceError(Exception):
+    def __init__(self, status: int, message: str, retry_after: Optional[float] = None):
+        super().__init__(f"{status}: {message}")
+        self.status = status
+        self.message = message
+        self.retry_after = retry_after
+
+
+class ServiceClient:
+    """Thin stdlib client for service/server.py (used by app.py when COPILOT_SERVICE_URL is set)."""
+
+    def __init__(self, base_url: str, timeout: float = DEFAULT_TIMEOUT_S, busy_retries: int = BUSY_RETRIES):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.busy_retries = busy_retries
+
+    def health(self) -> Dict[str, Any]:
+        return self._call("GET", "/health")
+
+    def metrics(self) -> Dict[str, Any]:
+        return self._call("GET", "/metrics")
+
+    def upload_dataset(self, filename: str, content: bytes) -> Dict[str, Any]:
+        return self._call("POST", f"/datasets?name={quote(filename)}", content, "text/csv")
+
+    def ask(self, question: str, datasets: Optional[List[str]] = None, context: str = "", primary: Optional[str] = None) -> Dict[str, Any]:
+        return self._call("POST", "/ask", _ask_body(question, datasets, context, primary))
+
+    def stream(self, question: str, datasets: Optional[List[str]] = None, context: str = "", primary: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Yield {"stage", "data"} events from /ask/stream as the service produces them."""
+        with self._open("POST", "/ask/stream", _ask_body(question, datasets, context, primary)) as response:
+            for line in response:
+                if line.strip():
+                    yield json.loads(line)
+
+    def _call(self, method: str, path: str, body=None, content_type: str = "application/json") -> Dict[str, Any]:
+        with self._open(method, path, body, content_type) as response:
+            return json.loads(response.read())
+
+    def _open(self, method: str, path: str, body=None, content_type: str = "application/json"):
+        if isinstance(body, dict):
+            body = json.dumps(body).encode("utf-8")
+        # 503 means the service is shedding load: wait as asked (bounded) and try again a few times
+        for attempt in range(self.busy_retries + 1):
+            request = Request(self.base_url + path, data=body, method=method, headers={"Content-Type": content_type})
+            try:
+                return urlopen(request, timeout=self.timeout)
+            except HTTPError as e:
+                error = _service_error(e)
+                if error.status != 503 or attempt == self.busy_retries:
+                    raise error
+                time.sleep(min(error.retry_after or 1.0, MAX_RETRY_WAIT_S))
+
+
+def _service_error(e: HTTPError) -> ServiceError:
+    try:
+        message = json.loads(e.read()).get("error", e.reason)
+    except ValueError:
+        message = e.reason
+    try:
+        retry_after = float(e.headers.get("Retry-After")) if e.headers.get("Retry-After") else None
+    except ValueError:
+        retry_after = None
+    return ServiceError(e.code, message, retry_after)
+
+
+def _ask_body(question, datasets, context, primary) -> Dict[str, Any]:
+    return {"question": question, "datasets": datasets or [], "context": context, "primary": primary}
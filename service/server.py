@@ -0,0 +1,494 @@
+"""
+Headless async HTTP service for the copilot pipeline.
+
+    python service/server.py --port 8080 --workers 8 --max-queue 32
+    LLM_PROVIDER=stub python service/server.py   # offline
+
+One process-wide LLM client and one thread pool are shared by every caller; requests beyond
+workers + max-queue get 503 + Retry-After instead of piling up. Stdlib asyncio only.
+
+Endpoints (JSON in/out):
+    GET  /health, /metrics
+    POST /datasets?name=events.csv   CSV body -> {name, version, summary, stats}
+    POST /gatekeep   {question, datasets?}          POST /plan    {question, datasets?}
+    POST /clarify    {tasks, datasets?}             POST /execute {tasks, datasets?}
+    POST /compose    {question, tasks, results}
+    POST /ask        {question, datasets?, primary?, context?}  -> full pipeline result
+    POST /ask/stream same body, NDJSON events ({"stage": ..., "data": ...}) as stages finish
+
+"datasets" is a list of versions returned by POST /datasets.
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import sys
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from typing import Optional, Dict, Any, List, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from config import AppConfig
+from llm.client import build_llm_client
+from core.gatekeeper import gatekeep
+from core.task_planner import plan_tasks
+from core.clarifier import clarify_tasks_if_needed
+from core.executors import execute_tasks
+from core.composer import compose
+from core.pipeline import run_pipeline
+
+DEFAULT_WORKERS = int(os.getenv("SERVICE_WORKERS", "8"))
+DEFAULT_MAX_QUEUE = int(os.getenv("SERVICE_MAX_QUEUE", "32"))
+MAX_BODY_BYTES = int(os.getenv("SERVICE_MAX_UPLOAD_MB", "200")) * 1024 * 1024
+MAX_DATASETS = 32
+MAX_CATALOGS = 16
+# Slow or oversized clients must not hold a connection (and its buffers) indefinitely
+HEADER_TIMEOUT_S = 30.0
+BODY_TIMEOUT_S = 300.0
+MAX_LINE_BYTES = 16 * 1024
+MAX_HEADERS = 100
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large",
+            431: "Request Header Fields Too Large",
+            500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+@dataclass
+class Request:
+    method: str
+    path: str
+    query: Dict[str, List[str]]
+    headers: Dict[str, str]
+    body: bytes
+
+    def json(self) -> Dict[str, Any]:
+        if not self.body:
+            return {}
+        try:
+            payload = json.loads(self.body)
+        except ValueError:
+            raise HTTPError(400, "Body is not valid JSON.")
+        if not isinstance(payload, dict):
+            raise HTTPError(400, "Body must be a JSON object.")
+        return payload
+
+
+class CopilotService:
+    """Routes, the shared worker pool / LLM client, the dataset store and admission control."""
+
+    def __init__(self, config: AppConfig, workers: int = DEFAULT_WORKERS, max_queue: int = DEFAULT_MAX_QUEUE):
+        self.config = config
+        self.llm = build_llm_client(config)
+        if config.prewarm:
+            self.llm.prewarm()
+
+        self.workers = workers
+        self.max_queue = max_queue
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="copilot")
+        self.datasets: "OrderedDict[str, Any]" = OrderedDict()
+        # (versions, primary) -> future of the built catalog; concurrent requests share one build
+        self.catalogs: "OrderedDict[Tuple[Tuple[str, ...], Optional[str]], asyncio.Future]" = OrderedDict()
+
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.errors = 0
+        self.latencies_ms: deque = deque(maxlen=2000)
+        self.started = time.time()
+
+        self.routes = {
+            ("GET", "/health"): self.health,
+            ("GET", "/metrics"): self.metrics,
+            ("POST", "/datasets"): self.upload_dataset,
+            ("POST", "/gatekeep"): self.gatekeep,
+            ("POST", "/plan"): self.plan,
+            ("POST", "/clarify"): self.clarify,
+            ("POST", "/execute"): self.execute,
+            ("POST", "/compose"): self.compose,
+            ("POST", "/ask"): self.ask,
+        }
+
+    # ------------------------------------------------------------------
+    # Worker pool + backpressure
+    # ------------------------------------------------------------------
+
+    def _admit(self):
+        # Event-loop thread only, so plain counters are safe
+        if self.in_flight >= self.workers + self.max_queue:
+            self.rejected += 1
+            raise HTTPError(503, f"Busy: {self.in_flight} requests in flight. Retry shortly.")
+        self.in_flight += 1
+
+    def _release(self, start: float, ok: bool = True):
+        self.in_flight -= 1
+        if ok:
+            self.completed += 1
+            self.latencies_ms.append((time.perf_counter() - start) * 1000)
+        else:
+            self.errors += 1
+
+    async def _run(self, fn, *args, **kwargs):
+        """Run blocking pipeline work on the shared pool, subject to admission control."""
+        self._admit()
+        return await self._execute(fn, *args, **kwargs)
+
+    async def _execute(self, fn, *args, **kwargs):
+        # Caller has already been admitted
+        start = time.perf_counter()
+        ok = False
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(self.pool, partial(fn, *args, **kwargs))
+            ok = True
+            return result
+        finally:
+            self._release(start, ok)
+
+    # ------------------------------------------------------------------
+    # Datasets
+    # ------------------------------------------------------------------
+
+    def _register(self, name: str, content: bytes):
+        from data_utils import load_csv
+        from core.datasets import register_dataset
+
+        return register_dataset(name, load_csv(io.BytesIO(content)), arrow_strings=self.config.arrow_strings)
+
+    async def _catalog(self, payload: Dict[str, Any]):
+        """
+        Catalog for the requested versions. Join discovery compares every sketch pair, so it is
+        built once per (versions, primary) on the pool, never on the event loop.
+        """
+        from core.datasets import build_catalog
+
+        versions = payload.get("datasets") or []
+        missing = [v for v in versions if v not in self.datasets]
+        if missing:
+            raise HTTPError(404, f"Unknown dataset version(s): {', '.join(missing)}. Upload them to /datasets first.")
+        if not versions:
+            return None
+
+        key = (tuple(versions), payload.get("primary"))
+        future = self.catalogs.get(key)
+        if future is None:
+            datasets = [self.datasets[v] for v in versions]
+            future = asyncio.get_running_loop().run_in_executor(self.pool, build_catalog, datasets, key[1])
+            self.catalogs[key] = future
+            while len(self.catalogs) > MAX_CATALOGS:
+                self.catalogs.popitem(last=False)
+        self.catalogs.move_to_end(key)
+        try:
+            return await asyncio.shield(future)
+        except Exception:
+            if self.catalogs.get(key) is future:
+                del self.catalogs[key]
+            raise
+
+    # ------------------------------------------------------------------
+    # Handlers
+    # ------------------------------------------------------------------
+
+    async def health(self, request: Request):
+        return {"status": "ok", "provider": self.config.provider, "workers": self.workers}
+
+    async def metrics(self, request: Request):
+        from data.sql_runner import RESULT_CACHE
+
+        latencies = sorted(self.latencies_ms)
+
+        def pct(p):
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))], 1) if latencies else None
+
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "queued": max(0, self.in_flight - self.workers),
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "errors": self.errors,
+            "latency_ms": {"p50": pct(0.5), "p95": pct(0.95), "p99": pct(0.99)},
+            "datasets": len(self.datasets),
+            "query_cache": RESULT_CACHE.stats(),
+            "uptime_s": round(time.time() - self.started, 1),
+        }
+
+    async def upload_dataset(self, request: Request):
+        from data.sql_runner import invalidate_dataset
+
+        if not request.body:
+            raise HTTPError(400, "Send the CSV file as the request body.")
+        name = (request.query.get("name") or ["dataset.csv"])[0]
+        dataset = await self._run(self._register, name, request.body)
+
+        self.datasets[dataset.version] = dataset
+        self.datasets.move_to_end(dataset.version)
+        while len(self.datasets) > MAX_DATASETS:
+            old, _ = self.datasets.popitem(last=False)
+            invalidate_dataset(old)
+            for key in [k for k in self.catalogs if old in k[0]]:
+                del self.catalogs[key]
+
+        return {"name": dataset.name, "version": dataset.version, "summary": dataset.summary, "stats": dataset.stats}
+
+    async def gatekeep(self, request: Request):
+        payload = request.json()
+        catalog = await self._catalog(payload)
+        return await self._run(gatekeep, self.llm, _question(payload), catalog.summary() if catalog else None)
+
+    async def plan(self, request: Request):
+        payload = request.json()
+        catalog = await self._catalog(payload)
+        return await self._run(plan_tasks, self.llm, _question(payload), catalog.summary() if catalog else None)
+
+    async def clarify(self, request: Request):
+        payload = request.json()
+        catalog = await self._catalog(payload)
+        return clarify_tasks_if_needed(_tasks(payload), catalog.summary() if catalog else None)
+
+    async def execute(self, request: Request):
+        payload = request.json()
+        catalog = await self._catalog(payload)
+        dataset = catalog.primary_dataset if catalog else None
+        results = await self._run(
+            execute_tasks, self.llm, _tasks(payload),
+            df_summary=catalog.summary() if catalog else None,
+            df=dataset.df if dataset else None,
+            dataset_version=dataset.version if dataset else None,
+            catalog=catalog
+        )
+        return {"results": results}
+
+    async def compose(self, request: Request):
+        payload = request.json()
+        return {"answer": compose(_question(payload), _tasks(payload), payload.get("results") or [])}
+
+    async def ask(self, request: Request):
+        payload = request.json()
+        catalog = await self._catalog(payload)
+        return await self._run(run_pipeline, self.llm, _question(payload), catalog, payload.get("context") or "")
+
+    async def ask_stream(self, request: Request, writer: asyncio.StreamWriter):
+        payload = request.json()
+        catalog = await self._catalog(payload)
+
+        loop = asyncio.get_running_loop()
+        events: asyncio.Queue = asyncio.Queue()
+
+        def emit(stage, data):
+            loop.call_soon_threadsafe(events.put_nowait, {"stage": stage, "data": data})
+
+        question = _question(payload)
+        # Admit before the 200 goes out so an overloaded service still answers 503
+        self._admit()
+        job = asyncio.ensure_future(
+            self._execute(run_pipeline, self.llm, question, catalog, payload.get("context") or "", emit)
+        )
+
+        await _start_stream(writer)
+        try:
+            while True:
+                getter = asyncio.ensure_future(events.get())
+                done, _ = await asyncio.wait({getter, job}, return_when=asyncio.FIRST_COMPLETED)
+                if getter in done:
+                    event = getter.result()
+                    await _write_chunk(writer, _dumps(event) + b"\n")
+                    if event["stage"] == "final":
+                        break
+                    continue
+                getter.cancel()
+                # Pipeline finished or failed without a final event
+                if job.exception() is not None:
+                    await _write_chunk(writer, _dumps({"stage": "error", "data": {"error": str(job.exception())}}) + b"\n")
+                    break
+                while not events.empty():
+                    await _write_chunk(writer, _dumps(events.get_nowait()) + b"\n")
+                break
+        finally:
+            await _end_stream(writer)
+
+    # ------------------------------------------------------------------
+    # HTTP plumbing
+    # ------------------------------------------------------------------
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    request = await _read_request(reader)
+                except HTTPError as e:
+                    await _send_json(writer, e.status, {"error": str(e)}, keep_alive=False)
+                    break
+                if request is None:
+                    break
+
+                keep_alive = request.headers.get("connection", "").lower() != "close"
+                try:
+                    if (request.method, request.path) == ("POST", "/ask/stream"):
+                        await self.ask_stream(request, writer)
+                    else:
+                        handler = self.routes.get((request.method, request.path))
+                        if handler is None:
+                            known = {path for _, path in self.routes} | {"/ask/stream"}
+                            raise HTTPError(405 if request.path in known else 404, f"No route for {request.method} {request.path}")
+                        await _send_json(writer, 200, await handler(request), keep_alive)
+                except HTTPError as e:
+                    extra = {"Retry-After": "1"} if e.status == 503 else None
+                    await _send_json(writer, e.status, {"error": str(e)}, keep_alive, extra)
+                except Exception as e:
+                    await _send_json(writer, 500, {"error": str(e)}, keep_alive)
+
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host: str, port: int):
+        server = await asyncio.start_server(self.handle, host, port, limit=MAX_LINE_BYTES)
+        print(f"Copilot service on http://{host}:{port} ({self.workers} workers, queue {self.max_queue}, "
+              f"provider {self.config.provider})", flush=True)
+        async with server:
+            await server.serve_forever()
+
+
+def _question(payload: Dict[str, Any]) -> str:
+    question = payload.get("question")
+    if not isinstance(question, str) or not question.strip():
+        raise HTTPError(400, "Missing 'question'.")
+    return question
+
+
+def _tasks(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+    tasks = payload.get("tasks")
+    if not isinstance(tasks, list):
+        raise HTTPError(400, "Missing 'tasks' (the planner output's task list).")
+    return tasks
+
+
+async def _read_request(reader: asyncio.StreamReader) -> Optional[Request]:
+    """
+    Parse one request. A client idle past HEADER_TIMEOUT_S (or slower than BODY_TIMEOUT_S
+    sending its body) raises asyncio.TimeoutError and handle() drops the connection.
+    """
+    line = await _read_line(reader)
+    if not line.strip():
+        return None
+    try:
+        method, target, _ = line.decode("latin-1").split()
+    except ValueError:
+        raise HTTPError(400, "Malformed request line.")
+
+    headers: Dict[str, str] = {}
+    for count in range(MAX_HEADERS + 1):
+        raw = await _read_line(reader)
+        if raw in (b"\r\n", b"\n", b""):
+            break
+        if count == MAX_HEADERS:
+            raise HTTPError(431, f"More than {MAX_HEADERS} headers.")
+        key, _, value = raw.decode("latin-1").partition(":")
+        headers[key.strip().lower()] = value.strip()
+
+    try:
+        length = int(headers.get("content-length") or 0)
+    except ValueError:
+        raise HTTPError(400, "Content-Length is not a number.")
+    if length < 0:
+        raise HTTPError(400, "Content-Length is negative.")
+    if length > MAX_BODY_BYTES:
+        raise HTTPError(413, f"Body over {MAX_BODY_BYTES // (1024 * 1024)} MB.")
+    body = await asyncio.wait_for(reader.readexactly(length), BODY_TIMEOUT_S) if length else b""
+
+    url = urlsplit(target)
+    return Request(method.upper(), url.path.rstrip("/") or "/", parse_qs(url.query), headers, body)
+
+
+async def _read_line(reader: asyncio.StreamReader) -> bytes:
+    try:
+        return await asyncio.wait_for(reader.readline(), HEADER_TIMEOUT_S)
+    except ValueError:
+        # The stream's limit (MAX_LINE_BYTES) was hit before a newline
+        raise HTTPError(431, f"Request line or header over {MAX_LINE_BYTES // 1024} KB.")
+
+
+def _json_default(obj):
+    if hasattr(obj, "to_plotly_json"):
+        return json.loads(obj.to_json())
+    if hasattr(obj, "to_dict") and hasattr(obj, "columns"):
+        return obj.to_dict(orient="records")
+    if hasattr(obj, "isoformat"):
+        return obj.isoformat()
+    if hasattr(obj, "item"):
+        return obj.item()
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    return str(obj)
+
+
+def _dumps(payload) -> bytes:
+    return json.dumps(payload, default=_json_default).encode("utf-8")
+
+
+def _head(status: int, headers: List[Tuple[str, str]]) -> bytes:
+    lines = [f"HTTP/1.1 {status} {_REASONS.get(status, 'OK')}"] + [f"{k}: {v}" for k, v in headers]
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+
+async def _send_json(writer, status: int, payload, keep_alive: bool = True, extra: Optional[Dict[str, str]] = None):
+    body = _dumps(payload)
+    headers = [
+        ("Content-Type", "application/json"),
+        ("Content-Length", str(len(body))),
+        ("Connection", "keep-alive" if keep_alive else "close"),
+    ] + list((extra or {}).items())
+    writer.write(_head(status, headers) + body)
+    await writer.drain()
+
+
+async def _start_stream(writer):
+    writer.write(_head(200, [("Content-Type", "application/x-ndjson"), ("Transfer-Encoding", "chunked"),
+                             ("Cache-Control", "no-cache")]))
+    await writer.drain()
+
+
+async def _write_chunk(writer, data: bytes):
+    writer.write(f"{len(data):x}\r\n".encode("latin-1") + data + b"\r\n")
+    await writer.drain()
+
+
+async def _end_stream(writer):
+    writer.write(b"0\r\n\r\n")
+    await writer.drain()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analytics copilot HTTP service")
+    parser.add_argument("--host", default=os.getenv("SERVICE_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("SERVICE_PORT", "8080")))
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--max-queue", type=int, default=DEFAULT_MAX_QUEUE)
+    args = parser.parse_args()
+
+    service = CopilotService(AppConfig.from_env(), workers=args.workers, max_queue=args.max_queue)
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
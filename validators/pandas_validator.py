@@ -1,5 +1,524 @@
+import ast
+import re
+from typing import Optional, List, Dict, Any, Tuple
+
+# Rough per-row cost of each anti-pattern (seconds) used to scale findings by dataset size
+ROW_COST_S = {
+    "row_loop": 50e-6,          # iterrows / range(len(df)) / df.index loops with per-row indexing
+    "itertuples_loop": 2e-6,
+    "apply_axis1": 15e-6,
+    "concat_in_loop": 1e-6,     # quadratic copying; assumes roughly one copy of the frame per iteration
+    "repeated_groupby": 50e-9,  # re-factorizing the same keys
+    "chained_indexing": 10e-9,  # extra copy, and the assignment may silently not land
+}
+
+DEFAULT_ROWS = 100_000
+REGENERATE_ABOVE_S = 0.5
+DEFAULT_FRAMES = frozenset({"df"})
+
+_PD_MODULES = {"pd", "pandas"}
+# Methods/attributes whose result is much smaller than the frame (loops over these aren't row loops)
+_REDUCING = {
+    "groupby", "resample", "rolling", "pivot", "pivot_table", "value_counts", "describe", "agg", "aggregate",
+    "sum", "mean", "median", "min", "max", "count", "nunique", "unique", "std", "var", "quantile",
+    "nlargest", "nsmallest", "head", "tail", "sample", "columns", "dtypes", "corr", "cov",
+}
+# Methods that never modify their receiver (unless called with inplace=True)
+_PURE_METHODS = {
+    "groupby", "copy", "head", "tail", "merge", "join", "query", "assign", "filter", "sort_values", "sort_index",
+    "agg", "aggregate", "sum", "mean", "median", "min", "max", "count", "nunique", "unique", "describe",
+    "pivot_table", "melt", "isin", "isna", "isnull", "notna", "notnull", "fillna", "dropna", "drop",
+    "drop_duplicates", "duplicated", "rename", "reset_index", "set_index", "astype", "to_dict", "to_numpy",
+    "to_list", "tolist", "value_counts", "apply", "map", "where", "mask", "round", "abs", "corr", "sample",
+    "nlargest", "nsmallest", "cumsum", "shift", "diff", "pct_change", "rolling", "resample", "explode", "any",
+    "all", "std", "var", "quantile", "between", "get", "select_dtypes", "reindex", "stack", "unstack", "clip",
+}
+
+_REFORMAT_NOTE = "# NOTE: auto-rewritten for performance; comments inside rewritten statements were not preserved."
+
+MESSAGES = {
+    "row_loop": "Python loop over rows; use vectorized column operations, np.where or merge instead.",
+    "itertuples_loop": "Python loop over itertuples; prefer vectorized column operations.",
+    "apply_axis1": "apply(axis=1) calls Python once per row; use vectorized column arithmetic, np.select or np.where.",
+    "concat_in_loop": "pd.concat inside a loop copies the accumulated frame every iteration; collect parts and concat once.",
+    "repeated_groupby": "Same groupby keys computed more than once; group once and reuse the GroupBy object.",
+    "chained_indexing": "Chained indexing assignment (df[a][b] = ...) may write to a copy; use df.loc[row, col] = ...",
+    "syntax_error": "Code does not parse as Python.",
+}
+
+def analyze_pandas_code(code: str, n_rows: Optional[int] = None, frames=DEFAULT_FRAMES) -> List[Dict[str, Any]]:
+    """
+    AST scan of generated pandas code for row-wise anti-patterns.
+
+    Each finding carries an estimated cost for n_rows (DEFAULT_ROWS when unknown), a severity,
+    and whether rewrite_pandas_code can fix it without the LLM. frames names the input
+    DataFrames (df, or the table names in a multi-table session).
+    """
+    rows = n_rows if n_rows is not None else DEFAULT_ROWS
+    try:
+        tree = ast.parse(code)
+    except SyntaxError as e:
+        return [_finding("syntax_error", e.lineno or 0, None, auto_fix=False)]
+
+    findings: List[Dict[str, Any]] = []
+    full_frames = _pandas_names(tree, frames, full_size=True)
+    pandas_names = _pandas_names(tree, frames)
+
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.For, ast.AsyncFor)):
+            rule = _row_loop_rule(node.iter, full_frames)
+            if rule:
+                findings.append(_finding(rule, node.lineno, rows * ROW_COST_S[rule], auto_fix=False))
+            for stmt in node.body:
+                if _concat_accumulator(stmt):
+                    findings.append(_finding(
+                        "concat_in_loop", stmt.lineno, rows * ROW_COST_S["concat_in_loop"],
+                        auto_fix=_concat_rewritable(node, stmt)
+                    ))
+
+        elif isinstance(node, ast.While):
+            for stmt in node.body:
+                if _concat_accumulator(stmt):
+                    findings.append(_finding(
+                        "concat_in_loop", stmt.lineno, rows * ROW_COST_S["concat_in_loop"],
+                        auto_fix=_concat_rewritable(node, stmt)
+                    ))
+
+        elif isinstance(node, ast.Call) and _is_apply_axis1(node):
+            findings.append(_finding("apply_axis1", node.lineno, rows * ROW_COST_S["apply_axis1"], auto_fix=False))
+
+        elif isinstance(node, (ast.Assign, ast.AugAssign)):
+            targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+            for target in targets:
+                if _is_chained_subscript(target):
+                    findings.append(_finding(
+                        "chained_indexing", node.lineno, rows * ROW_COST_S["chained_indexing"],
+                        auto_fix=_chained_loc(target, pandas_names) is not None
+                    ))
+
+    hoistable = {key for _, key, _ in _hoistable_groupbys(tree)}
+    for key, calls in _groupby_calls(tree).items():
+        if len(calls) > 1:
+            findings.append(_finding(
+                "repeated_groupby", calls[1].lineno, rows * ROW_COST_S["repeated_groupby"] * (len(calls) - 1),
+                auto_fix=key in hoistable
+            ))
+
+    return sorted(findings, key=lambda f: f["line"])
+
+def rewrite_pandas_code(code: str, frames=DEFAULT_FRAMES) -> Tuple[str, List[Dict[str, Any]]]:
+    """
+    Apply the semantics-preserving rewrites (chained indexing, concat-in-loop, repeated groupby).
+
+    Untouched top-level statements keep their original text and comments; only rewritten
+    statements are regenerated, with a note at the top when that dropped comments.
+    """
+    try:
+        original = ast.parse(code)
+        tree = ast.parse(code)
+    except SyntaxError:
+        return code, []
+
+    rewrites: List[Dict[str, Any]] = []
+    _ChainedIndexRewriter(rewrites, _pandas_names(tree, frames)).visit(tree)
+    _rewrite_concat_loops(tree, rewrites)
+    _hoist_groupbys(tree, rewrites)
+
+    if not rewrites:
+        return code, []
+    ast.fix_missing_locations(tree)
+    return _splice(code, original, tree), rewrites
+
+def needs_regeneration(findings: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Findings that rewriting can't fix and that are too slow (or broken) to ship as-is."""
+    return [
+        f for f in findings
+        if not f["auto_fix"] and (f["rule"] == "syntax_error" or f["est_seconds"] >= REGENERATE_ABOVE_S)
+    ]
+
+def review_pandas_code(
+    code: str, n_rows: Optional[int] = None, frames=DEFAULT_FRAMES
+) -> Tuple[str, List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Rewrite what is safe, then return (code, remaining findings, applied rewrites)."""
+    code, rewrites = rewrite_pandas_code(code, frames)
+    return code, analyze_pandas_code(code, n_rows, frames), rewrites
+
 def validate_pandas_code(code: str) -> tuple[bool, list[str]]:
-    issues = []
-    if "iterrows" in code:
-        issues.append("Avoid iterrows; prefer vectorized ops.")
+    issues = [f["message"] for f in analyze_pandas_code(code)]
     return (len(issues) == 0), issues
+
+# ---------------------------------------------------------------------------
+# Detection helpers
+# ---------------------------------------------------------------------------
+
+def _finding(rule, line, est_seconds, auto_fix):
+    if est_seconds is None:
+        severity = "high"
+    elif est_seconds >= 1:
+        severity = "high"
+    elif est_seconds >= 0.1:
+        severity = "medium"
+    else:
+        severity = "low"
+    return {
+        "rule": rule,
+        "line": line,
+        "message": MESSAGES[rule],
+        "est_seconds": None if est_seconds is None else round(est_seconds, 3),
+        "severity": severity,
+        "auto_fix": auto_fix,
+    }
+
+def _chain(node):
+    """(root name, methods/attributes used) for expressions like df[mask].merge(...).groupby(k).sum()."""
+    used = []
+    while True:
+        if isinstance(node, ast.Call):
+            if not isinstance(node.func, ast.Attribute):
+                return None, used
+            used.append(node.func.attr)
+            node = node.func.value
+        elif isinstance(node, ast.Attribute):
+            used.append(node.attr)
+            node = node.value
+        elif isinstance(node, ast.Subscript):
+            node = node.value
+        else:
+            return (node.id if isinstance(node, ast.Name) else None), used
+
+def _pandas_names(tree, frames, full_size=False):
+    """
+    Input frames plus names assigned from pandas expressions rooted at them (or at pd.*).
+    With full_size, results of aggregations/groupbys/head etc. are left out.
+    """
+    names = set(frames)
+    assigns = sorted((n for n in ast.walk(tree) if isinstance(n, ast.Assign)), key=lambda n: (n.lineno, n.col_offset))
+    for node in assigns:
+        root, used = _chain(node.value)
+        if root not in names and root not in _PD_MODULES:
+            continue
+        if full_size and set(used) & _REDUCING:
+            continue
+        names |= {t.id for t in node.targets if isinstance(t, ast.Name)}
+    return names
+
+def _is_frame(node, frames):
+    root, used = _chain(node)
+    return root in frames and not set(used) & _REDUCING
+
+def _row_loop_rule(it, frames):
+    # df.iterrows() / df.itertuples() on a full-size frame
+    if isinstance(it, ast.Call) and isinstance(it.func, ast.Attribute) and _is_frame(it.func.value, frames):
+        if it.func.attr == "iterrows":
+            return "row_loop"
+        if it.func.attr == "itertuples":
+            return "itertuples_loop"
+    # range(len(df)) / range(df.shape[0])
+    if isinstance(it, ast.Call) and isinstance(it.func, ast.Name) and it.func.id == "range" and it.args:
+        arg = it.args[-1] if len(it.args) > 1 else it.args[0]
+        if isinstance(arg, ast.Call) and isinstance(arg.func, ast.Name) and arg.func.id == "len" and arg.args:
+            return "row_loop" if _is_frame(arg.args[0], frames) else None
+        if isinstance(arg, ast.Subscript) and isinstance(arg.value, ast.Attribute) and arg.value.attr == "shape":
+            return "row_loop" if _is_frame(arg.value.value, frames) else None
+    # for i in df.index
+    if isinstance(it, ast.Attribute) and it.attr == "index" and _is_frame(it.value, frames):
+        return "row_loop"
+    return None
+
+def _is_apply_axis1(call):
+    if not (isinstance(call.func, ast.Attribute) and call.func.attr == "apply"):
+        return False
+    for kw in call.keywords:
+        if kw.arg == "axis" and isinstance(kw.value, ast.Constant) and kw.value.value in (1, "columns"):
+            return True
+    return False
+
+def _is_concat(node):
+    return (
+        isinstance(node, ast.Call)
+        and isinstance(node.func, ast.Attribute)
+        and node.func.attr == "concat"
+        and isinstance(node.func.value, ast.Name)
+        and node.func.value.id in {"pd", "pandas"}
+    )
+
+def _concat_accumulator(stmt):
+    """Name of acc for `acc = pd.concat([acc, part], ...)` (acc first), else None."""
+    if not (isinstance(stmt, ast.Assign) and len(stmt.targets) == 1 and isinstance(stmt.targets[0], ast.Name)):
+        return None
+    call = stmt.value
+    if not _is_concat(call) or not call.args or not isinstance(call.args[0], (ast.List, ast.Tuple)):
+        return None
+    elts = call.args[0].elts
+    acc = stmt.targets[0].id
+    if len(elts) >= 2 and isinstance(elts[0], ast.Name) and elts[0].id == acc:
+        return acc
+    return None
+
+_FLAT_CONCAT_KWARGS = {"ignore_index", "axis", "join", "sort", "copy"}
+
+def _concat_rewritable(loop, stmt):
+    acc = _concat_accumulator(stmt)
+    if len(stmt.value.args) != 1 or loop.orelse:
+        return False
+    # One concat of all parts equals the chain of pairwise concats only for these options (not keys=, names=, ...)
+    if any(kw.arg not in _FLAT_CONCAT_KWARGS for kw in stmt.value.keywords):
+        return False
+    # acc may only appear in the concat statement itself
+    uses = 0
+    for node in ast.walk(loop):
+        if isinstance(node, ast.Name) and node.id == acc:
+            uses += 1
+    return uses == 2
+
+def _is_chained_subscript(target):
+    return isinstance(target, ast.Subscript) and isinstance(target.value, ast.Subscript) and isinstance(target.value.value, ast.Name)
+
+def _is_label(node):
+    return isinstance(node, ast.Constant) and isinstance(node.value, str)
+
+def _chained_loc(target, pandas_names):
+    """
+    (frame, row, col) for df[col][row] / df[row][col] targets where one key is a column label,
+    only when the root is known to be a pandas object (a dict of dicts must stay as it is).
+    """
+    inner = target.value
+    if inner.value.id not in pandas_names:
+        return None
+    if _is_label(inner.slice) and not _is_label(target.slice):
+        return inner.value, target.slice, inner.slice
+    if _is_label(target.slice) and not _is_label(inner.slice):
+        return inner.value, inner.slice, target.slice
+    return None
+
+def _groupby_calls(tree):
+    calls: Dict[str, List[ast.Call]] = {}
+    for node in ast.walk(tree):
+        if (
+            isinstance(node, ast.Call)
+            and isinstance(node.func, ast.Attribute)
+            and node.func.attr == "groupby"
+            and isinstance(node.func.value, ast.Name)
+        ):
+            calls.setdefault(ast.dump(node), []).append(node)
+    return calls
+
+def _stored_names(node):
+    """Names assigned, or mutated through subscripts/attributes/inplace calls, anywhere under node."""
+    names = set()
+    for sub in ast.walk(node):
+        if isinstance(sub, ast.Name) and isinstance(sub.ctx, (ast.Store, ast.Del)):
+            names.add(sub.id)
+        elif isinstance(sub, (ast.Subscript, ast.Attribute)) and isinstance(sub.ctx, (ast.Store, ast.Del)):
+            root = sub.value
+            while isinstance(root, (ast.Subscript, ast.Attribute)):
+                root = root.value
+            if isinstance(root, ast.Name):
+                names.add(root.id)
+        elif isinstance(sub, ast.Call) and isinstance(sub.func, ast.Attribute):
+            # df.update(...), df.insert(...), df["a"].fillna(0, inplace=True): anything not known to be pure
+            root = sub.func.value
+            while isinstance(root, (ast.Subscript, ast.Attribute)):
+                root = root.value
+            if isinstance(root, ast.Name) and (
+                sub.func.attr not in _PURE_METHODS or any(kw.arg == "inplace" for kw in sub.keywords)
+            ):
+                names.add(root.id)
+    return names
+
+def _hoistable_groupbys(tree):
+    """(statement list, call key, first index) for repeated top-level groupbys whose inputs don't change in between."""
+    body = tree.body
+    out = []
+    for key, calls in _groupby_calls(tree).items():
+        if len(calls) < 2:
+            continue
+        idx = []
+        for call in calls:
+            owner = next((i for i, stmt in enumerate(body) if any(n is call for n in ast.walk(stmt))), None)
+            if owner is None or _inside_scope(body[owner], call):
+                break
+            idx.append(owner)
+        else:
+            first, last = min(idx), max(idx)
+            inputs = {n.id for n in ast.walk(calls[0]) if isinstance(n, ast.Name)}
+            safe = True
+            for i in range(first, last + 1):
+                stmt = body[i]
+                scope = stmt.value if (i == last and isinstance(stmt, ast.Assign)) else stmt
+                if _stored_names(scope) & inputs:
+                    safe = False
+                    break
+            if safe:
+                out.append((body, key, first))
+    return out
+
+def _inside_scope(stmt, target):
+    """True if target sits inside a nested function/lambda/comprehension of stmt (different evaluation scope)."""
+    for node in ast.walk(stmt):
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda, ast.ClassDef)):
+            if any(n is target for n in ast.walk(node)):
+                return True
+    return False
+
+# ---------------------------------------------------------------------------
+# Rewriters
+# ---------------------------------------------------------------------------
+
+class _ChainedIndexRewriter(ast.NodeTransformer):
+    def __init__(self, rewrites, pandas_names):
+        self.rewrites = rewrites
+        self.pandas_names = pandas_names
+
+    def _fix(self, target, lineno):
+        if not _is_chained_subscript(target):
+            return target
+        loc = _chained_loc(target, self.pandas_names)
+        if loc is None:
+            return target
+        frame, row, col = loc
+        self.rewrites.append({"rule": "chained_indexing", "line": lineno})
+        return ast.Subscript(
+            value=ast.Attribute(value=frame, attr="loc", ctx=ast.Load()),
+            slice=ast.Tuple(elts=[row, col], ctx=ast.Load()),
+            ctx=ast.Store(),
+        )
+
+    def visit_Assign(self, node):
+        node.targets = [self._fix(t, node.lineno) for t in node.targets]
+        return node
+
+    def visit_AugAssign(self, node):
+        node.target = self._fix(node.target, node.lineno)
+        return node
+
+def _rewrite_concat_loops(tree, rewrites):
+    counter = [0]
+
+    def visit_body(body):
+        out = []
+        for stmt in body:
+            for field in ("body", "orelse", "finalbody"):
+                if isinstance(getattr(stmt, field, None), list):
+                    setattr(stmt, field, visit_body(getattr(stmt, field)))
+            for handler in getattr(stmt, "handlers", []):
+                handler.body = visit_body(handler.body)
+
+            if isinstance(stmt, (ast.For, ast.While)):
+                target = next(
+                    (s for s in stmt.body if _concat_accumulator(s) and _concat_rewritable(stmt, s)),
+                    None
+                )
+                if target is not None:
+                    acc = _concat_accumulator(target)
+                    parts = f"_{acc}_parts" if counter[0] == 0 else f"_{acc}_parts{counter[0]}"
+                    counter[0] += 1
+                    call = target.value
+                    new_parts = call.args[0].elts[1:]
+                    append = (
+                        ast.parse(f"{parts}.append(_part)").body[0] if len(new_parts) == 1
+                        else ast.parse(f"{parts}.extend(_parts)").body[0]
+                    )
+                    append.value.args = [new_parts[0] if len(new_parts) == 1 else ast.List(elts=new_parts, ctx=ast.Load())]
+                    stmt.body = [append if s is target else s for s in stmt.body]
+
+                    # acc is left as it was when the loop never ran (pd.concat([None]) would raise)
+                    final = ast.Assign(
+                        targets=[ast.Name(id=acc, ctx=ast.Store())],
+                        value=ast.IfExp(
+                            test=ast.parse(f"len({parts}) > 1", mode="eval").body,
+                            body=ast.Call(
+                                func=call.func,
+                                args=[ast.Name(id=parts, ctx=ast.Load())],
+                                keywords=call.keywords,
+                            ),
+                            orelse=ast.parse(f"{parts}[0]", mode="eval").body,
+                        ),
+                    )
+                    # New statements take the loop's position so source splicing keeps them in place
+                    out.append(ast.copy_location(ast.parse(f"{parts} = [{acc}]").body[0], stmt))
+                    out.append(stmt)
+                    out.append(ast.copy_location(final, stmt))
+                    rewrites.append({"rule": "concat_in_loop", "line": target.lineno})
+                    continue
+            out.append(stmt)
+        return out
+
+    tree.body = visit_body(tree.body)
+
+def _hoist_groupbys(tree, rewrites):
+    plans = sorted(_hoistable_groupbys(tree), key=lambda p: p[2], reverse=True)
+    calls = _groupby_calls(tree)
+
+    for n, (body, key, first) in enumerate(plans):
+        sample = calls[key][0]
+        name = f"_grouped_{re.sub(r'[^0-9a-zA-Z_]', '', sample.func.value.id)}_{n}"
+        hoisted = ast.copy_location(ast.Assign(targets=[ast.Name(id=name, ctx=ast.Store())], value=sample), body[first])
+        _ReplaceCalls(key, name).visit(tree)
+        body.insert(first, hoisted)
+        rewrites.append({"rule": "repeated_groupby", "line": sample.lineno})
+
+class _ReplaceCalls(ast.NodeTransformer):
+    def __init__(self, key, name):
+        self.key = key
+        self.name = name
+
+    def visit_Call(self, node):
+        self.generic_visit(node)
+        if ast.dump(node) == self.key:
+            return ast.Name(id=self.name, ctx=ast.Load())
+        return node
+
+def _splice(code, original, rewritten):
+    """
+    Source for the rewritten tree that reuses the original text (comments included) of every
+    top-level statement the rewrites didn't touch; changed statements are unparsed in place.
+    """
+    lines = code.splitlines()
+    orig = original.body
+    starts = [min([stmt.lineno] + [d.lineno for d in getattr(stmt, "decorator_list", [])]) - 1 for stmt in orig]
+    ends = [stmt.end_lineno for stmt in orig]
+    if any(starts[k] < ends[k - 1] for k in range(1, len(orig))):
+        # Several statements share a line (a = 1; b = 2): no clean ranges to reuse
+        return _REFORMAT_NOTE + "\n" + ast.unparse(rewritten)
+
+    # Each new statement belongs to an original one: its unchanged twin, or the one it was rewritten from
+    dumps = [ast.dump(stmt) for stmt in orig]
+    owned: List[List[Tuple[ast.stmt, bool]]] = [[] for _ in orig]
+    i = 0
+    for stmt in rewritten.body:
+        match = next((k for k in range(i, len(orig)) if dumps[k] == ast.dump(stmt)), None)
+        if match is not None:
+            owned[match].append((stmt, True))
+            i = match + 1
+            continue
+        k = next((k for k in range(len(orig)) if stmt.lineno - 1 < ends[k]), len(orig) - 1)
+        k = max(k, i - 1, 0)
+        owned[k].append((stmt, False))
+
+    comment_lines = _comment_lines(code)
+    out: List[str] = []
+    lossy = False
+    prev_end = 0
+    for k in range(len(orig)):
+        out.extend(lines[prev_end:starts[k]])
+        kept = any(same for _, same in owned[k])
+        for stmt, same in owned[k]:
+            out.extend(lines[starts[k]:ends[k]] if same else ast.unparse(stmt).splitlines())
+        if not kept:
+            lossy |= any(starts[k] < n <= ends[k] for n in comment_lines)
+        prev_end = ends[k]
+    out.extend(lines[prev_end:])
+
+    if lossy:
+        out.insert(0, _REFORMAT_NOTE)
+    return "\n".join(out)
+
+def _comment_lines(code):
+    import io
+    import tokenize
+
+    try:
+        return {tok.start[0] for tok in tokenize.generate_tokens(io.StringIO(code).readline) if tok.type == tokenize.COMMENT}
+    except (tokenize.TokenError, SyntaxError):
+        return set()
@@ -0,0 +1,325 @@
+import re
+import sqlite3
+from typing import Optional, Dict, Any, List, Tuple
+
+from validators.sql_validator import SQL_KEYWORDS, strip_sql_comments_and_literals
+
+# Thresholds (estimated rows) before a plan step is worth a warning
+FULL_SCAN_ROWS = 100_000
+SORT_ROWS = 1_000_000
+NESTED_LOOP_ROWS = 100_000_000
+
+# Warehouse functions sqlite lacks; registered as no-ops so EXPLAIN can still plan the query
+_PLACEHOLDER_FUNCTIONS = [
+    "date_trunc", "date_add", "date_sub", "datediff", "dateadd", "to_char", "to_date", "date_format",
+    "year", "month", "day", "week", "quarter", "now", "getdate", "ifnull", "nvl", "split_part",
+]
+
+_NON_SARGABLE = re.compile(
+    r"\b(strftime|date|datetime|julianday|date_trunc|year|month|day|week|quarter|to_char|date_format|cast|extract)"
+    r"\s*\(([^()]*)\)\s*(=|<>|!=|<=|>=|<|>|\bbetween\b|\bin\b)",
+    re.I,
+)
+
+# A table/alias name: bare, "double-quoted", `backticked` or [bracketed]
+_IDENT = r'(?:"[^"]+"|`[^`]+`|\[[^\]]+\]|[a-z_]\w*)'
+_TABLE = rf"{_IDENT}(?:\s*\.\s*{_IDENT})*"
+
+_CLAUSE_END = r"(?=\bwhere\b|\bgroup\s+by\b|\border\s+by\b|\bhaving\b|\blimit\b|\bunion\b|\)|;|$)"
+
+
+def lint_sql_cost(
+    sql: str,
+    df_summary: Optional[Any] = None,
+    tables: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Plan the query with EXPLAIN QUERY PLAN on an empty sqlite replica carrying the profile's
+    row counts / cardinalities, and flag expensive plan shapes before the SQL runs anywhere real.
+
+    tables maps table name -> profile; when omitted every table the query reads is assumed to
+    be the uploaded dataset (df_summary).
+    """
+    body = strip_sql_comments_and_literals(sql)
+    refs = referenced_tables(body)
+    tables = {k.lower(): v for k, v in (tables or {}).items()}
+    if df_summary:
+        for name, _ in refs:
+            tables.setdefault(name.split(".")[-1], df_summary)
+
+    findings: List[Dict[str, Any]] = []
+    findings += _non_sargable_filters(body, tables)
+    if not refs and re.search(r"\bfrom\b", body, flags=re.I):
+        findings.append({
+            "rule": "plan_unavailable",
+            "severity": "low",
+            "message": "Could not tell which tables the query reads, so its plan was not checked.",
+        })
+
+    report: Dict[str, Any] = {"plan": [], "findings": findings, "index_suggestions": []}
+    if not tables:
+        report["warnings"] = [f["message"] for f in findings]
+        return report
+
+    conn = build_replica(tables)
+    plan_sql = unqualify_tables(body, refs)
+    try:
+        plan = explain(conn, plan_sql)
+    except sqlite3.Error as e:
+        findings.append({
+            "rule": "plan_unavailable",
+            "severity": "low",
+            "message": f"Could not plan the query on the sqlite replica ({e}).",
+        })
+        report["warnings"] = [f["message"] for f in findings]
+        conn.close()
+        return report
+
+    aliases = _alias_map(refs)
+    rows = {name: _profile_rows(profile) for name, profile in tables.items()}
+    report["plan"] = _render(plan)
+    findings += _plan_findings(plan, aliases, rows, body)
+    report["index_suggestions"] = _index_suggestions(conn, plan_sql, plan, aliases, tables, body)
+    report["warnings"] = [f["message"] for f in findings]
+    conn.close()
+    return report
+
+
+def referenced_tables(body: str) -> List[Tuple[str, Optional[str]]]:
+    """
+    (table, alias) pairs read in FROM/JOIN clauses, excluding CTE names and subqueries.
+    Names come back lower-cased with identifier quotes removed ("Events" -> events).
+    """
+    low = body.lower()
+    ctes = {_unquote(c) for c in re.findall(rf"(?:\bwith(?:\s+recursive)?|,)\s*({_IDENT})\s+as\s*\(", low)}
+    refs = []
+    for clause in re.findall(r"\bfrom\s+(.*?)" + _CLAUSE_END, low, flags=re.S):
+        for piece in re.split(r",|\bjoin\b", clause):
+            piece = re.sub(r"^\s*(natural|left|right|full|inner|outer|cross|lateral|\s)*", "", piece)
+            piece = re.split(r"\bon\b|\busing\b", piece)[0].strip()
+            m = re.match(rf"({_TABLE})(?:\s+(?:as\s+)?({_IDENT}))?", piece)
+            if not m or m.group(1) in SQL_KEYWORDS:
+                continue
+            table = _unquote(m.group(1))
+            if table in ctes:
+                continue
+            alias = m.group(2) if m.group(2) and m.group(2) not in SQL_KEYWORDS else None
+            refs.append((table, _unquote(alias) if alias else None))
+    return refs
+
+
+def unqualify_tables(sql: str, refs: List[Tuple[str, Optional[str]]]) -> str:
+    """Replace schema-qualified table names (quoted or not) in sql with the bare, quoted table name."""
+    for table, _ in refs:
+        parts = table.split(".")
+        if len(parts) > 1:
+            quoted = r"\s*\.\s*".join(rf"(?:\"{re.escape(p)}\"|`{re.escape(p)}`|\[{re.escape(p)}\]|\b{re.escape(p)}\b)" for p in parts)
+            sql = re.sub(quoted, f'"{parts[-1]}"', sql, flags=re.I)
+    return sql
+
+
+def build_replica(tables: Dict[str, Any]) -> sqlite3.Connection:
+    """Empty in-memory tables shaped like the profiles, with sqlite_stat1 row counts so the planner sizes them."""
+    conn = sqlite3.connect(":memory:")
+    for fn in _PLACEHOLDER_FUNCTIONS:
+        conn.create_function(fn, -1, lambda *args: None)
+
+    for name, profile in tables.items():
+        cols = ", ".join(f'"{c["name"]}" {_sqlite_type(c.get("dtype", ""))}' for c in _profile_columns(profile))
+        conn.execute(f'CREATE TABLE "{name}" ({cols or "_placeholder TEXT"})')
+
+    conn.execute("ANALYZE")
+    for name, profile in tables.items():
+        conn.execute("INSERT INTO sqlite_stat1 VALUES (?, NULL, ?)", (name, str(max(1, _profile_rows(profile)))))
+    conn.execute("ANALYZE sqlite_schema")
+    return conn
+
+
+def explain(conn: sqlite3.Connection, sql: str) -> List[Tuple[int, int, str]]:
+    return [(row[0], row[1], row[3]) for row in conn.execute("EXPLAIN QUERY PLAN " + sql.strip().rstrip(";"))]
+
+
+# ---------------------------------------------------------------------------
+# Plan analysis
+# ---------------------------------------------------------------------------
+
+def _plan_findings(plan, aliases, rows, body) -> List[Dict[str, Any]]:
+    findings: List[Dict[str, Any]] = []
+
+    by_parent: Dict[int, List[Tuple[int, str]]] = {}
+    for node_id, parent, detail in plan:
+        by_parent.setdefault(parent, []).append((node_id, detail))
+
+    for parent, steps in by_parent.items():
+        # One nested-loop join per parent: SCAN/SEARCH steps are loops, in join order
+        loops = [(d, _step_table(d, aliases)) for _, d in steps if d.startswith(("SCAN ", "SEARCH "))]
+        est = 1
+        scanned_inner = []
+        for i, (detail, table) in enumerate(loops):
+            table_rows = rows.get(table, 0) if table else 0
+            if detail.startswith("SCAN ") and table:
+                est *= max(1, table_rows)
+                if table_rows >= FULL_SCAN_ROWS:
+                    findings.append({
+                        "rule": "full_scan",
+                        "severity": "low" if i == 0 else "high",
+                        "message": f"Full scan of {table} (~{table_rows:,} rows).",
+                    })
+                if i > 0 and not _has_join_predicate(body, table, aliases):
+                    scanned_inner.append(table)
+            elif detail.startswith("SEARCH ") and "AUTOMATIC" in detail and table:
+                findings.append({
+                    "rule": "automatic_index",
+                    "severity": "medium",
+                    "message": f"Join on {table} only works via a temporary automatic index; consider a real index on the join key.",
+                })
+
+        for table in scanned_inner:
+            findings.append({
+                "rule": "missing_join_predicate",
+                "severity": "high",
+                "message": f"{table} is joined without a usable join predicate (cartesian product).",
+            })
+        if len(loops) > 1 and est >= NESTED_LOOP_ROWS:
+            findings.append({
+                "rule": "nested_loop",
+                "severity": "high",
+                "message": f"Nested loop join touches ~{est:,.0f} row combinations.",
+            })
+
+    outer_rows = max(rows.values(), default=0)
+    grouped = any(d == "USE TEMP B-TREE FOR GROUP BY" for _, _, d in plan)
+    for _, _, detail in plan:
+        if detail.startswith("USE TEMP B-TREE"):
+            # ORDER BY after GROUP BY sorts the groups, not the input rows
+            if outer_rows >= SORT_ROWS and not (grouped and detail.endswith("ORDER BY")):
+                what = detail.replace("USE TEMP B-TREE FOR ", "").lower()
+                findings.append({
+                    "rule": "temp_btree",
+                    "severity": "medium",
+                    "message": f"Sorts ~{outer_rows:,} rows in a temp B-tree for {what}.",
+                })
+        elif detail.startswith("CORRELATED"):
+            findings.append({
+                "rule": "correlated_subquery",
+                "severity": "high",
+                "message": "Correlated subquery runs once per outer row; rewrite as a JOIN or window function.",
+            })
+    return findings
+
+
+def _non_sargable_filters(body, tables) -> List[Dict[str, Any]]:
+    """Functions wrapped around a column inside WHERE/ON comparisons defeat indexes and partition pruning."""
+    columns = {str(c["name"]).lower(): str(c["name"]) for p in tables.values() for c in _profile_columns(p)}
+    findings = []
+    for clause in re.findall(r"\b(?:where|on|having)\b(.*?)" + r"(?=\bgroup\s+by\b|\border\s+by\b|\blimit\b|\bunion\b|;|$)", body, flags=re.I | re.S):
+        for fn, args, _ in _NON_SARGABLE.findall(clause):
+            idents = {t.split(".")[-1] for t in re.findall(r"[a-z_][\w.]*", args.lower())}
+            hit = sorted(columns[i] for i in idents if i in columns) if columns else sorted(idents - SQL_KEYWORDS)
+            if hit:
+                findings.append({
+                    "rule": "non_sargable_filter",
+                    "severity": "medium",
+                    "message": f"{fn.upper()}() wraps {', '.join(hit)} in a filter; compare the raw column to a range instead.",
+                })
+    return findings
+
+
+def _index_suggestions(conn, sql, plan, aliases, tables, body) -> List[str]:
+    """Try a hypothetical index per filtered/joined/grouped column of each scanned table; keep the ones the planner uses."""
+    scanned = {_step_table(d, aliases) for _, _, d in plan if d.startswith("SCAN ")}
+    predicates = " ".join(re.findall(r"\b(?:where|on)\b(.*?)(?=\bgroup\s+by\b|\border\s+by\b|\blimit\b|\bjoin\b|\bunion\b|;|$)", body, flags=re.I | re.S)).lower()
+    group_keys = {
+        t.split(".")[-1]
+        for clause in re.findall(r"\bgroup\s+by\b(.*?)(?=\bhaving\b|\border\s+by\b|\blimit\b|\bunion\b|\)|;|$)", body, flags=re.I | re.S)
+        for t in re.findall(r"[a-z_][\w.]*", clause.lower())
+    }
+    suggestions = []
+
+    for table in sorted(t for t in scanned if t in tables):
+        profile = tables[table]
+        rows = max(1, _profile_rows(profile))
+        for col in _profile_columns(profile):
+            name = str(col["name"])
+            filtered = re.search(rf"(?<![\w]){re.escape(name.lower())}\s*(=|<|>|\bin\b|\bbetween\b)|(=|<|>)\s*[\w.]*\b{re.escape(name.lower())}\b", predicates)
+            if not filtered and name.lower() not in group_keys:
+                continue
+            index = f"idx_{table}_{name}".lower()
+            per_key = max(1, rows // max(1, int(col.get("unique") or rows)))
+            try:
+                conn.execute(f'CREATE INDEX "{index}" ON "{table}"("{name}")')
+                conn.execute("INSERT INTO sqlite_stat1 VALUES (?, ?, ?)", (table, index, f"{rows} {per_key}"))
+                conn.execute("ANALYZE sqlite_schema")
+                if any(index in d for _, _, d in explain(conn, sql)):
+                    suggestions.append(f'CREATE INDEX {index} ON {table}({name});')
+            except sqlite3.Error:
+                pass
+            finally:
+                conn.execute(f'DROP INDEX IF EXISTS "{index}"')
+                conn.execute("DELETE FROM sqlite_stat1 WHERE idx = ?", (index,))
+    return suggestions
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+def _profile_columns(profile) -> List[Dict[str, Any]]:
+    if isinstance(profile, dict):
+        return profile.get("columns", [])
+    return [{"name": line.split()[1]} for line in str(profile).splitlines() if line.startswith("- ")]
+
+
+def _profile_rows(profile) -> int:
+    if isinstance(profile, dict):
+        return int(profile.get("rows", 0))
+    m = re.search(r"Rows:\s*(\d+)", str(profile))
+    return int(m.group(1)) if m else 0
+
+
+def _sqlite_type(dtype: str) -> str:
+    dtype = dtype.lower()
+    if "int" in dtype or "bool" in dtype:
+        return "INTEGER"
+    if "float" in dtype:
+        return "REAL"
+    return "TEXT"
+
+
+def _alias_map(refs) -> Dict[str, str]:
+    aliases = {}
+    for table, alias in refs:
+        short = table.split(".")[-1]
+        aliases[short] = short
+        if alias:
+            aliases[alias] = short
+    return aliases
+
+
+def _unquote(name: str) -> str:
+    return ".".join(part.strip().strip('"`[]') for part in re.findall(_IDENT, name))
+
+
+def _has_join_predicate(body, table, aliases) -> bool:
+    names = [a for a, t in aliases.items() if t == table]
+    for name in names:
+        ref = rf"\b{re.escape(name)}\.\w+"
+        if re.search(rf"{ref}\s*=\s*[a-z_]\w*\.\w+|[a-z_]\w*\.\w+\s*=\s*{ref}", body, flags=re.I):
+            return True
+    return bool(re.search(r"\busing\s*\(", body, flags=re.I))
+
+
+def _step_table(detail, aliases) -> Optional[str]:
+    m = re.match(r"(?:SCAN|SEARCH) (\S+)", detail)
+    if not m:
+        return None
+    return aliases.get(m.group(1).lower())
+
+
+def _render(plan) -> List[str]:
+    depth = {0: -1}
+    lines = []
+    for node_id, parent, detail in plan:
+        depth[node_id] = depth.get(parent, -1) + 1
+        lines.append("  " * depth[node_id] + detail)
+    return lines
@@ -1,19 +1,75 @@
 import re
 
-def validate_sql(sql, df_summary):
+# Keywords and common functions that are never schema identifiers
+SQL_KEYWORDS = {
+    "select", "from", "where", "group", "by", "order", "having", "limit", "offset", "and", "or", "not",
+    "as", "on", "join", "inner", "left", "right", "full", "outer", "cross", "using", "with", "union",
+    "all", "distinct", "case", "when", "then", "else", "end", "in", "is", "null", "like", "between",
+    "asc", "desc", "over", "partition", "rows", "range", "preceding", "following", "current", "row",
+    "unbounded", "exists", "true", "false", "interval", "cast", "date", "timestamp", "day", "week",
+    "month", "quarter", "year", "count", "sum", "avg", "min", "max", "coalesce", "nullif", "round",
+    "lag", "lead", "rank", "dense_rank", "row_number", "date_trunc", "extract", "strftime", "julianday",
+    "lower", "upper", "abs", "substr", "substring", "length", "trim", "ifnull", "filter", "within",
+    "int", "integer", "float", "real", "numeric", "decimal", "text", "varchar", "char", "boolean",
+    "first_value", "last_value", "ntile", "percentile_cont", "median", "stddev", "variance", "now",
+    "current_date", "current_timestamp", "datetime", "date_add", "date_sub", "datediff", "dateadd",
+}
+
+
+def schema_columns(df_summary):
+    """
+    Lower-cased column names from either summary format (data_utils dict or "- col" text);
+    a multi-table summary ({"tables": {name: profile}}) yields every table's columns.
+    """
     if not df_summary:
-        return sql
+        return []
+    if isinstance(df_summary, dict) and "tables" in df_summary:
+        return [c for profile in df_summary["tables"].values() for c in schema_columns(profile)]
+    if isinstance(df_summary, dict):
+        return [str(c["name"]).lower() for c in df_summary.get("columns", [])]
 
     columns = []
-    for line in df_summary.splitlines():
+    for line in str(df_summary).splitlines():
         if line.startswith("- "):
             columns.append(line.split()[1].lower())
+    return columns
+
+
+def strip_sql_comments_and_literals(sql):
+    sql = re.sub(r"--[^\n]*", " ", sql)
+    sql = re.sub(r"/\*.*?\*/", " ", sql, flags=re.S)
+    return re.sub(r"'(?:[^']|'')*'", "''", sql)
 
-    tokens = re.findall(r"\b[a-zA-Z_]+\b", sql.lower())
 
-    unknown = [t for t in tokens if t not in columns and t not in {"select","from","where","group","by","and","or","as","join"}]
+def schema_coverage(sql, df_summary):
+    """
+    Share of identifiers in the SQL that resolve to a schema column or a name the query
+    defines itself (CTE, table alias, column alias). None when there is no schema.
+    """
+    columns = set(schema_columns(df_summary))
+    if not columns:
+        return None
+
+    body = strip_sql_comments_and_literals(sql).lower()
+    defined = set(re.findall(r"\bas\s+([a-z_]\w*)", body))
+    for table, alias in re.findall(r"\b(?:from|join)\s+([a-z_][\w.]*)(?:\s+(?:as\s+)?([a-z_]\w*))?", body):
+        defined.add(table)
+        if alias and alias not in SQL_KEYWORDS:
+            defined.add(alias)
+
+    tokens = [
+        t for t in re.findall(r"\b[a-z_][a-z0-9_]*\b", body)
+        if t not in SQL_KEYWORDS and t not in defined
+    ]
+    if not tokens:
+        return 1.0
+    return round(sum(t in columns for t in tokens) / len(tokens), 2)
+
+
+def validate_sql(sql, df_summary):
+    coverage = schema_coverage(sql, df_summary)
 
-    if len(unknown) > 5:
+    if coverage is not None and coverage < 0.6:
         return sql + "\n\n-- WARNING: Possible schema mismatch detected."
 
     return sql